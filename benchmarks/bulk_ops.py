@@ -0,0 +1,79 @@
+"""
+Bulk repository operations benchmark.
+
+Compares per-user save_user()/get_user()/delete_user() calls with
+save_users()/get_users()/delete_users() for growing batch sizes.
+
+Usage:
+    python -m benchmarks.bulk_ops --batch-sizes 1 10 100 1000
+"""
+import argparse
+import asyncio
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import Awaitable, Callable
+
+from db import BaseRepository, MemoryRepository
+from db.sqlite import SQLiteRepository
+
+
+async def timed(operation: Callable[[], Awaitable[object]]) -> float:
+    started_at = perf_counter()
+    await operation()
+    return perf_counter() - started_at
+
+
+async def run_batch(repo: BaseRepository, batch_size: int, offset: int) -> list[tuple[str, float]]:
+    ids = list(range(offset, offset + batch_size))
+    users = {user_id: {"username": f"user{user_id}", "language_code": "en"} for user_id in ids}
+
+    async def save_one_by_one() -> None:
+        for user_id, data in users.items():
+            await repo.save_user(user_id, data)
+
+    async def get_one_by_one() -> None:
+        for user_id in ids:
+            await repo.get_user(user_id)
+
+    async def delete_one_by_one() -> None:
+        for user_id in ids:
+            await repo.delete_user(user_id)
+
+    results = []
+    for name, single, bulk in (
+        ("save", save_one_by_one, lambda: repo.save_users(users)),
+        ("get", get_one_by_one, lambda: repo.get_users(ids)),
+        ("delete", delete_one_by_one, lambda: repo.delete_users(ids)),
+    ):
+        single_time = await timed(single)
+        if name == "delete":
+            await repo.save_users(users)  # Recreate users for bulk delete
+        bulk_time = await timed(bulk)
+        results.append((name, single_time / bulk_time if bulk_time else float("inf")))
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, repo in (
+            ("memory", MemoryRepository()),
+            ("sqlite", SQLiteRepository(str(Path(tmp) / "bench.db"))),
+        ):
+            await repo.init()
+            print(f"{name}: speedup of bulk operations over one-by-one calls")
+            offset = 0
+            for batch_size in args.batch_sizes:
+                results = await run_batch(repo, batch_size, offset)
+                offset += batch_size
+                speedups = "  ".join(f"{op} x{speedup:<7.1f}" for op, speedup in results)
+                print(f"  batch {batch_size:>6}:  {speedups}")
+            await repo.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
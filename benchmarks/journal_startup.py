@@ -0,0 +1,60 @@
+"""
+JournaledRepository startup benchmark.
+
+Writes users through the journal, then measures how long init() of a new
+repository takes to load them from the snapshot and from the log alone.
+
+Usage:
+    python -m benchmarks.journal_startup --users 1000000
+"""
+import argparse
+import asyncio
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from db import CompactMemoryRepository, JournaledRepository, MemoryRepository
+
+
+BATCH_SIZE = 10000
+
+
+async def fill(path: Path, users: int, snapshot: bool) -> None:
+    repo = JournaledRepository(MemoryRepository(), path, compact_after=users * 2)
+    await repo.init()
+    for start in range(0, users, BATCH_SIZE):
+        await repo.save_users({
+            user_id: {"username": f"user_{user_id}", "first_name": "Name", "language_code": "en"}
+            for user_id in range(start, min(start + BATCH_SIZE, users))
+        })
+    if snapshot:
+        await repo.compact()
+    await repo.close()
+
+
+async def load(path: Path, repo_class: type) -> float:
+    started_at = perf_counter()
+    repo = JournaledRepository(repo_class(), path)
+    await repo.init()
+    elapsed = perf_counter() - started_at
+    await repo.close()
+    return elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for snapshot in (True, False):
+            path = Path(tmp) / ("snapshot" if snapshot else "log") / "users"
+            await fill(path, args.users, snapshot)
+            source = "snapshot" if snapshot else "log only"
+            for repo_class in (MemoryRepository, CompactMemoryRepository):
+                elapsed = await load(path, repo_class)
+                print(f"{source:<9} -> {repo_class.__name__:<24} {elapsed:>7.2f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+"""
+Fluent format_value() throughput benchmark.
+
+Compares plain FluentLocalization with CachedFluentLocalization, without
+and with the LRU cache of formatted results, for a static message and a
+message with arguments.
+
+Usage:
+    python -m benchmarks.l10n_format --locale ru --number 100000
+"""
+import argparse
+from timeit import timeit
+from typing import Any, Callable, Optional
+
+from fluent.runtime import FluentLocalization, FluentResourceLoader
+
+from fluent_loader import get_fluent_localizations
+
+
+ArgsFactory = Callable[[int], Optional[dict[str, Any]]]
+
+CASES: dict[str, tuple[str, ArgsFactory]] = {
+    "static": ("hello-msg", lambda i: None),
+    "with args": ("users-title", lambda i: {"total": 1234}),
+    "with distinct args": ("users-title", lambda i: {"total": i}),
+}
+
+
+def run(l10n: FluentLocalization, msg_id: str, make_args: ArgsFactory, number: int) -> float:
+    calls = iter(range(number))
+    elapsed = timeit(lambda: l10n.format_value(msg_id, make_args(next(calls))), number=number)
+    return number / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--locales-dir", default="l10n")
+    parser.add_argument("--locale", default="ru")
+    parser.add_argument("--fallback", default="en")
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+
+    plain = FluentLocalization(
+        locales=[args.locale, args.fallback],
+        resource_ids=["{locale}.ftl"],
+        resource_loader=FluentResourceLoader(args.locales_dir),
+    )
+    cached = get_fluent_localizations(args.locales_dir, args.fallback)[args.locale]
+    lru = get_fluent_localizations(args.locales_dir, args.fallback, cache_size=1024)[args.locale]
+
+    print(f"{'':<20} {'plain':>10} {'cached':>10} {'cached+lru':>10}  (calls/s)")
+    for name, (msg_id, make_args) in CASES.items():
+        rates = [run(l10n, msg_id, make_args, args.number) for l10n in (plain, cached, lru)]
+        print(f"{name:<20} " + " ".join(f"{rate:>10.0f}" for rate in rates))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Event loop latency benchmark for log sinks.
+
+Logs from concurrent "handlers" into an output that takes `--write-delay`
+seconds per write, like a slow docker log driver, and measures how late a
+ticker task wakes up (event loop lag) and how long each log call takes.
+Compares no logging, the synchronous BytesLoggerFactory and QueueLoggerFactory,
+with both sync (`info`) and async (`ainfo`) calls.
+
+Usage:
+    python -m benchmarks.log_latency --handlers 50 --records 200 --write-delay 0.0005
+"""
+import argparse
+import asyncio
+import io
+import statistics
+import time
+from typing import Any, Optional
+
+import structlog
+from structlog import BytesLoggerFactory
+
+from config_reader import LogConfig, LogRenderer
+from logs import QueueLoggerFactory, get_processors
+
+
+class SlowStream(io.BytesIO):
+    """In-memory binary stream whose writes take a fixed time."""
+
+    def __init__(self, delay: float) -> None:
+        super().__init__()
+        self.delay = delay
+
+    def write(self, b: bytes) -> int:
+        time.sleep(self.delay)
+        return super().write(b)
+
+
+async def measure_lag(stop: asyncio.Event, lags: list[float], interval: float = 0.001) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def handler(logger: Any, method: str, records: int, call_times: list[float]) -> None:
+    for i in range(records):
+        start = time.perf_counter()
+        if logger is not None:
+            if method == "ainfo":
+                await logger.ainfo("Command handled", user_id=i, command="/start")
+            else:
+                logger.info("Command handled", user_id=i, command="/start")
+        call_times.append(time.perf_counter() - start)
+        await asyncio.sleep(0)
+
+
+async def run(logger: Any, method: str, handlers: int, records: int) -> tuple[list, list, float]:
+    stop = asyncio.Event()
+    lags: list[float] = []
+    call_times: list[float] = []
+    ticker = asyncio.create_task(measure_lag(stop, lags))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(logger, method, records, call_times) for _ in range(handlers)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await ticker
+    return lags, call_times, elapsed
+
+
+def make_logger(
+    sink: str,
+    stream: SlowStream,
+) -> tuple[Optional[Any], Optional[QueueLoggerFactory]]:
+    if sink == "off":
+        return None, None
+
+    log_config = LogConfig(renderer=LogRenderer.JSON)
+    processors = get_processors(log_config)
+    factory: Optional[QueueLoggerFactory] = None
+    if sink == "queue":
+        factory = QueueLoggerFactory(
+            processors.pop(), file=stream, max_queue_size=100000, binary=True,
+        )
+        logger_factory: Any = factory
+    else:
+        logger_factory = BytesLoggerFactory(file=stream)
+
+    logger = structlog.wrap_logger(
+        logger_factory(),
+        processors=processors,
+        wrapper_class=structlog.make_filtering_bound_logger(0),
+    )
+    return logger, factory
+
+
+def percentile(values: list[float], q: int) -> float:
+    if len(values) < 2:
+        return 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--handlers", type=int, default=50)
+    parser.add_argument("--records", type=int, default=200, help="records per handler")
+    parser.add_argument("--write-delay", type=float, default=0.0005)
+    args = parser.parse_args()
+
+    print(
+        f"{'sink':<8} {'call':<6} {'lag p50':>9} {'lag p99':>9} {'lag max':>9}"
+        f" {'call p99':>9} {'total':>8}  (ms)"
+    )
+    for sink in ("off", "write", "queue"):
+        for method in ("info", "ainfo"):
+            if sink == "off" and method == "ainfo":
+                continue
+            stream = SlowStream(args.write_delay)
+            logger, factory = make_logger(sink, stream)
+            lags, call_times, elapsed = asyncio.run(
+                run(logger, method, args.handlers, args.records)
+            )
+            if factory is not None:
+                factory.close()
+
+            print(
+                f"{sink:<8} {method if logger else '-':<6}"
+                f" {percentile(lags, 50) * 1000:>9.2f}"
+                f" {percentile(lags, 99) * 1000:>9.2f}"
+                f" {max(lags, default=0) * 1000:>9.2f}"
+                f" {percentile(call_times, 99) * 1000:>9.3f}"
+                f" {elapsed * 1000:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
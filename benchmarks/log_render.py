@@ -0,0 +1,73 @@
+"""
+JSON log rendering throughput benchmark.
+
+Compares the previous renderer (ordered dict copy + json.dumps) with
+JSONBytesRenderer on the json module and on orjson, for a typical handler
+log record.
+
+Usage:
+    python -m benchmarks.log_render --number 200000
+"""
+import argparse
+import json
+from timeit import timeit
+from typing import Any, Callable
+
+import structlog
+
+import logs
+from logs import JSONBytesRenderer
+
+
+def ordered_json_serializer(data: dict, *args: Any, **kwargs: Any) -> str:
+    """Renderer used before JSONBytesRenderer, kept as the baseline."""
+    result = {}
+    for key in ("timestamp", "level", "event"):
+        if key in data:
+            result[key] = data.pop(key)
+    result.update(**data)
+    return json.dumps(result, default=str)
+
+
+def make_event() -> dict[str, Any]:
+    return {
+        "event": "Command handled",
+        "user_id": 123456789,
+        "chat_id": -1001234567890,
+        "command": "/start",
+        "locale": "en",
+        "duration": 0.0123,
+        "timestamp": "2024-01-01 12:00:00",
+        "level": "info",
+    }
+
+
+def run(renderer: Callable[..., Any], number: int) -> float:
+    elapsed = timeit(lambda: renderer(None, "info", make_event()), number=number)
+    return number / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=200000)
+    args = parser.parse_args()
+
+    baseline = structlog.processors.JSONRenderer(serializer=ordered_json_serializer)
+    renderer = JSONBytesRenderer()
+    orjson = logs.orjson
+
+    print(f"{'renderer':<28} {'lines/s':>10}")
+    print(f"{'dict copy + json':<28} {run(baseline, args.number):>10.0f}")
+
+    logs.orjson = None
+    print(f"{'JSONBytesRenderer (json)':<28} {run(renderer, args.number):>10.0f}")
+    logs.orjson = orjson
+
+    if orjson is not None:
+        print(f"{'JSONBytesRenderer (orjson)':<28} {run(renderer, args.number):>10.0f}")
+    else:
+        print("orjson is not installed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Log timestamp processor throughput benchmark.
+
+Compares structlog's TimeStamper with CachedTimeStamper for the default
+format, a format with microseconds and ISO 8601, in local time and UTC.
+
+Usage:
+    python -m benchmarks.log_timestamp --number 200000
+"""
+import argparse
+from timeit import timeit
+from typing import Any, Callable
+
+from structlog.processors import TimeStamper
+
+from logs import CachedTimeStamper
+
+
+FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S.%f", "iso")
+
+
+def run(stamper: Callable[..., Any], number: int) -> float:
+    elapsed = timeit(lambda: stamper(None, "info", {}), number=number)
+    return number / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=200000)
+    args = parser.parse_args()
+
+    print(f"{'format':<24} {'utc':<6} {'TimeStamper':>12} {'cached':>12}  (calls/s)")
+    for fmt in FORMATS:
+        for utc in (False, True):
+            plain = run(TimeStamper(fmt=fmt, utc=utc), args.number)
+            cached = run(CachedTimeStamper(fmt=fmt, utc=utc), args.number)
+            print(f"{fmt:<24} {str(utc):<6} {plain:>12.0f} {cached:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+In-memory repository footprint benchmark.
+
+Fills MemoryRepository and CompactMemoryRepository with the same users
+and reports traced memory per user.
+
+Usage:
+    python -m benchmarks.memory_store --users 200000
+"""
+import argparse
+import asyncio
+import gc
+import random
+import tracemalloc
+
+from typing import Any, Iterator
+
+from db import BaseRepository, CompactMemoryRepository, MemoryRepository
+
+
+LANGUAGES = ["en", "ru", "de", "es", "pt-br", "uk", "tr", None]
+
+
+def make_users(count: int) -> Iterator[tuple[int, dict[str, Any]]]:
+    # Same users on every call; strings are built per user, like parsed updates
+    rnd = random.Random(0)
+    for i in range(count):
+        language = rnd.choice(LANGUAGES)
+        yield rnd.randrange(10 ** 6, 7 * 10 ** 9), {
+            "username": f"user_{i}" if rnd.random() < 0.7 else None,
+            "first_name": f"Name{i % 5000}",
+            "last_name": f"Surname{i}" if rnd.random() < 0.4 else None,
+            "language_code": language.encode().decode() if language else None,
+        }
+
+
+async def measure(repo: BaseRepository, count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    for user_id, data in make_users(count):
+        await repo.save_user(user_id, data)
+    await repo.get_users_page(None, 10)  # Builds the sorted ID index
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / count
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=200000)
+    args = parser.parse_args()
+
+    for repo in (MemoryRepository(), CompactMemoryRepository()):
+        per_user = await measure(repo, args.users)
+        print(f"{type(repo).__name__:<26} {per_user:>8.0f} bytes/user")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Per-update overhead of Prometheus metrics middlewares.
+
+Feeds message updates through a dispatcher with one router and a handler
+that does nothing, without and with BotMetrics set up, and reports
+updates per second. Since the difference is within the noise of dispatching,
+the two metrics middlewares are also timed on their own around a no-op
+handler. No requests are sent.
+
+Usage:
+    python -m benchmarks.metrics_overhead --number 20000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Chat, Message, Update, User
+
+from middlewares import BotMetrics
+from middlewares.metrics import EventMetricsMiddleware, HandlerMetricsMiddleware
+
+
+def make_dispatcher(with_metrics: bool) -> Dispatcher:
+    router = Router(name="personal")
+
+    @router.message()
+    async def on_message(message: Message) -> None:
+        pass
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    if with_metrics:
+        BotMetrics().setup(dp)
+    return dp
+
+
+def make_update(update_id: int) -> Update:
+    user = User(id=1, is_bot=False, first_name="Test")
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            date=datetime.now(),
+            chat=Chat(id=1, type="private"),
+            from_user=user,
+            text="hello",
+        ),
+    )
+
+
+async def run(dp: Dispatcher, bot: Bot, number: int) -> float:
+    updates = [make_update(i) for i in range(number)]
+    start = time.perf_counter()
+    for update in updates:
+        await dp.feed_update(bot, update)
+    return time.perf_counter() - start
+
+
+async def run_middlewares(dp: Dispatcher, number: int) -> float:
+    metrics = BotMetrics()
+    metrics.setup(dp)
+    router = dp.sub_routers[0]
+    outer = EventMetricsMiddleware(
+        metrics.events.labels("message"),
+        metrics.errors.labels("message"),
+    )
+    inner = HandlerMetricsMiddleware(metrics)
+    data = {"event_router": router, "handler": router.message.handlers[0]}
+
+    async def handler(event: object, data: dict) -> None:
+        pass
+
+    async def inner_chain(event: object, data: dict) -> None:
+        await inner(handler, event, data)
+
+    start = time.perf_counter()
+    for _ in range(number):
+        await outer(inner_chain, None, data)
+    middlewares = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(number):
+        await handler(None, data)
+    return middlewares - (time.perf_counter() - start)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bot = Bot("123456:TEST")
+    plain_dp, instrumented_dp = make_dispatcher(False), make_dispatcher(True)
+    try:
+        # Interleaved runs, best of each, so warm-up and drift affect both alike
+        plain = instrumented = float("inf")
+        for _ in range(args.repeat):
+            plain = min(plain, await run(plain_dp, bot, args.number))
+            instrumented = min(instrumented, await run(instrumented_dp, bot, args.number))
+    finally:
+        await bot.session.close()
+
+    print(f"without metrics: {args.number / plain:>10.0f} updates/s")
+    print(f"with metrics:    {args.number / instrumented:>10.0f} updates/s")
+    overhead = await run_middlewares(make_dispatcher(False), args.number)
+    print(f"middlewares:     {overhead / args.number * 1e6:>10.2f} us/update")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
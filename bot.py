@@ -1,18 +1,63 @@
 import asyncio
 import signal
+from pathlib import Path
 from typing import Optional
 
 import structlog
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 from structlog.typing import FilteringBoundLogger
 
-from config_reader import get_config, BotConfig, LogConfig, L10nConfig, ThrottlingConfig
-from logs import get_structlog_config
-from fluent_loader import get_fluent_localization
-from middlewares import L10nMiddleware, ThrottlingMiddleware
+from config_reader import (
+    get_config,
+    BotConfig,
+    BroadcastConfig,
+    ChatMembersConfig,
+    DatabaseBackend,
+    DatabaseConfig,
+    FloodControlConfig,
+    LogConfig,
+    L10nConfig,
+    MetricsConfig,
+    ProfilingConfig,
+    ReloadConfig,
+    SchedulerConfig,
+    ThrottlingConfig,
+    ThrottlingStorageType,
+    WebhookConfig,
+)
+from db import (
+    BaseRepository,
+    CachedRepository,
+    CompactMemoryRepository,
+    JournaledRepository,
+    MemoryRepository,
+)
+from logs import LogSampler, QueueLoggerFactory, get_structlog_config
+from fluent_loader import get_fluent_localizations
+from middlewares import (
+    BaseThrottlingStorage,
+    BotMetrics,
+    FloodControlMiddleware,
+    L10nMiddleware,
+    MemoryThrottlingStorage,
+    RedisThrottlingStorage,
+    ThrottlingMiddleware,
+    UpdateScheduler,
+)
 from handlers import register_all_handlers
+from utils import (
+    Broadcaster,
+    ChatAdminIndex,
+    ChatMemberCache,
+    HotReloader,
+    LoopLagMonitor,
+    MetricsServer,
+    Profiler,
+)
 
 
 async def on_startup(bot: Bot, logger: FilteringBoundLogger) -> None:
@@ -25,33 +70,262 @@ async def on_startup(bot: Bot, logger: FilteringBoundLogger) -> None:
     )
 
 
-async def on_shutdown(bot: Bot, logger: FilteringBoundLogger) -> None:
+async def on_shutdown(bot: Bot, dp: Dispatcher, logger: FilteringBoundLogger) -> None:
     """Actions to perform on bot shutdown."""
+    # Queued updates are handled first, while everything their handlers use is still open
+    scheduler: Optional[UpdateScheduler] = dp.get("scheduler")
+    if scheduler is not None:
+        await scheduler.close()
+        await logger.ainfo("Update scheduler stats", **scheduler.stats())
+
+    reloader: Optional[HotReloader] = dp.get("reloader")
+    if reloader is not None:
+        await reloader.close()
+
+    profiler: Optional[Profiler] = dp.get("profiler")
+    if profiler is not None:
+        await profiler.close()
+
+    loop_monitor: Optional[LoopLagMonitor] = dp.get("loop_monitor")
+    if loop_monitor is not None:
+        await loop_monitor.close()
+        await logger.ainfo("Event loop monitor stats", **loop_monitor.stats())
+
+    metrics_server: Optional[MetricsServer] = dp.get("metrics_server")
+    if metrics_server is not None:
+        await metrics_server.close()
+
+    broadcaster: Optional[Broadcaster] = dp.get("broadcaster")
+    if broadcaster is not None:
+        await broadcaster.close()
+
+    admin_index: Optional[ChatAdminIndex] = dp.get("admin_index")
+    if admin_index is not None:
+        await admin_index.close()
+        await logger.ainfo("Chat admin index stats", **admin_index.stats())
+
+    throttling_storage: Optional[BaseThrottlingStorage] = dp.get("throttling_storage")
+    if throttling_storage is not None:
+        await throttling_storage.close()
+
+    flood_control: Optional[FloodControlMiddleware] = dp.get("flood_control")
+    if flood_control is not None:
+        await logger.ainfo("Flood control stats", **flood_control.stats())
+
+    member_cache: Optional[ChatMemberCache] = dp.get("member_cache")
+    if member_cache is not None:
+        await logger.ainfo("Chat member cache stats", **member_cache.stats())
+
+    repo: Optional[BaseRepository] = dp.get("repo")
+    if repo is not None:
+        if isinstance(repo, CachedRepository):
+            await logger.ainfo("User cache stats", **repo.stats())
+        await repo.close()
     await logger.ainfo("Bot stopped")
 
+    for processor in structlog.get_config()["processors"]:
+        if isinstance(processor, LogSampler):
+            processor.flush()
+
+    log_factory = dp.get("log_factory")
+    if isinstance(log_factory, QueueLoggerFactory):
+        if log_factory.dropped:
+            await logger.awarning("Log records dropped", **log_factory.stats())
+        await asyncio.to_thread(log_factory.close)
+
+
+def create_repository(database_config: DatabaseConfig) -> BaseRepository:
+    """Create repository for the configured database backend."""
+    repo: BaseRepository
+    if database_config.backend == DatabaseBackend.SQLITE:
+        # Imported here, so other backends work without the optional dependency
+        from db.sqlite import SQLiteRepository
 
-def setup_middlewares(dp: Dispatcher, l10n_config: L10nConfig, throttling_config: ThrottlingConfig) -> None:
-    """Register all middlewares."""
-    locale = get_fluent_localization(
-        locale=l10n_config.default_locale,
+        Path(database_config.sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+        repo = SQLiteRepository(
+            database_config.sqlite_path,
+            journal_mode=database_config.sqlite_journal_mode,
+            synchronous=database_config.sqlite_synchronous,
+            mmap_size=database_config.sqlite_mmap_size,
+            cache_size=database_config.sqlite_cache_size,
+            write_behind=database_config.write_behind,
+            write_batch_size=database_config.write_batch_size,
+            flush_interval=database_config.flush_interval,
+            readers=database_config.sqlite_readers,
+            acquire_timeout=database_config.sqlite_acquire_timeout,
+            reader_max_lifetime=database_config.sqlite_reader_max_lifetime,
+        )
+    elif database_config.backend == DatabaseBackend.POSTGRES:
+        from db.postgres import AsyncpgRepository
+
+        repo = AsyncpgRepository(
+            database_config.postgres_dsn.get_secret_value(),
+            min_size=database_config.postgres_min_size,
+            max_size=database_config.postgres_max_size,
+        )
+    else:
+        if database_config.backend == DatabaseBackend.COMPACT_MEMORY:
+            repo = CompactMemoryRepository()
+        else:
+            repo = MemoryRepository()
+
+        if database_config.journal_enabled:
+            repo = JournaledRepository(
+                repo,
+                database_config.journal_path,
+                fsync_interval=database_config.journal_fsync_interval,
+                compact_after=database_config.journal_compact_after,
+            )
+        # Already a dict lookup, nothing to cache
+        return repo
+
+    if database_config.cache_enabled:
+        repo = CachedRepository(
+            repo,
+            ttl=database_config.cache_ttl,
+            max_size=database_config.cache_max_size,
+        )
+    return repo
+
+
+def setup_middlewares(
+    dp: Dispatcher,
+    l10n_config: L10nConfig,
+    throttling_config: ThrottlingConfig,
+) -> tuple[L10nMiddleware, Optional[ThrottlingMiddleware]]:
+    """Register all middlewares and return the ones that can be reconfigured."""
+    locales = get_fluent_localizations(
         locales_dir=l10n_config.locales_path,
+        fallback_locale=l10n_config.fallback_locale,
+        cache_size=l10n_config.format_cache_size,
+    )
+    l10n = L10nMiddleware(
+        locales,
+        default_locale=l10n_config.default_locale,
+        repo=dp.get("repo") if l10n_config.use_stored_locale else None,
     )
 
+    throttling: Optional[ThrottlingMiddleware] = None
     if throttling_config.enabled:
-        dp.message.outer_middleware(ThrottlingMiddleware(
+        storage: BaseThrottlingStorage
+        if throttling_config.storage == ThrottlingStorageType.REDIS:
+            storage = RedisThrottlingStorage.from_url(throttling_config.redis_url)
+        else:
+            storage = MemoryThrottlingStorage(max_users=throttling_config.max_users)
+        dp["throttling_storage"] = storage
+
+        # Inner middleware, so that per-handler flags are available
+        throttling = ThrottlingMiddleware(
             rate_limit=throttling_config.rate_limit,
-            max_users=throttling_config.max_users,
-        ))
+            burst=throttling_config.burst,
+            storage=storage,
+        )
+        dp.message.middleware(throttling)
+        dp.callback_query.middleware(throttling)
+
+    dp.message.outer_middleware(l10n)
+    dp.callback_query.outer_middleware(l10n)
+    dp.pre_checkout_query.outer_middleware(l10n)
 
-    dp.message.outer_middleware(L10nMiddleware(locale))
-    dp.callback_query.outer_middleware(L10nMiddleware(locale))
-    dp.pre_checkout_query.outer_middleware(L10nMiddleware(locale))
+    return l10n, throttling
+
+
+def setup_metrics(dp: Dispatcher, throttling: Optional[ThrottlingMiddleware]) -> BotMetrics:
+    """Instrument handlers and export stats of bot components."""
+    metrics = BotMetrics()
+    metrics.setup(dp)
+
+    for name in ("scheduler", "admin_index", "flood_control", "member_cache", "loop_monitor"):
+        component = dp.get(name)
+        if component is not None:
+            metrics.add_stats(name, component.stats)
+    if throttling is not None:
+        metrics.add_stats("throttling", throttling.stats)
+    repo = dp.get("repo")
+    if isinstance(repo, CachedRepository):
+        metrics.add_stats("user_cache", repo.stats)
+    log_factory = dp.get("log_factory")
+    if isinstance(log_factory, QueueLoggerFactory):
+        metrics.add_stats("logs", log_factory.stats)
+
+    return metrics
+
+
+async def run_polling(
+    dp: Dispatcher,
+    bot: Bot,
+    stop_event: asyncio.Event,
+    logger: FilteringBoundLogger,
+    handle_as_tasks: bool = True,
+) -> None:
+    """Receive updates with long polling until stop_event is set."""
+    polling_task = asyncio.create_task(
+        dp.start_polling(bot, skip_updates=False, handle_as_tasks=handle_as_tasks)
+    )
+
+    await stop_event.wait()
+    await logger.ainfo("Shutdown signal received...")
+
+    polling_task.cancel()
+    try:
+        await polling_task
+    except asyncio.CancelledError:
+        pass
+
+
+async def run_webhook(
+    dp: Dispatcher,
+    bot: Bot,
+    stop_event: asyncio.Event,
+    webhook_config: WebhookConfig,
+    logger: FilteringBoundLogger,
+) -> None:
+    """Receive updates with aiohttp webhook server until stop_event is set."""
+    secret_token = (
+        webhook_config.secret_token.get_secret_value()
+        if webhook_config.secret_token else None
+    )
+
+    app = web.Application()
+    # Telegram gets its response right away, updates are processed in background tasks
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        handle_in_background=True,
+        secret_token=secret_token,
+    ).register(app, path=webhook_config.path)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=webhook_config.host, port=webhook_config.port)
+
+    try:
+        await site.start()
+        await bot.set_webhook(
+            url=webhook_config.url.rstrip("/") + webhook_config.path,
+            secret_token=secret_token,
+            max_connections=webhook_config.max_connections,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        await logger.ainfo(
+            "Webhook server started",
+            host=webhook_config.host,
+            port=webhook_config.port,
+            path=webhook_config.path,
+        )
+
+        await stop_event.wait()
+        await logger.ainfo("Shutdown signal received...")
+    finally:
+        await runner.cleanup()
 
 
 async def main() -> None:
     """Main entry point."""
     log_config = get_config(model=LogConfig, root_key="logs")
-    structlog.configure(**get_structlog_config(log_config))
+    structlog_config = get_structlog_config(log_config)
+    structlog.configure(**structlog_config)
 
     logger: FilteringBoundLogger = structlog.get_logger()
 
@@ -63,16 +337,132 @@ async def main() -> None:
     except KeyError:
         throttling_config = ThrottlingConfig()  # Use defaults
 
+    try:
+        chat_members_config = get_config(model=ChatMembersConfig, root_key="chat_members")
+    except KeyError:
+        chat_members_config = ChatMembersConfig()  # Use defaults
+
+    try:
+        webhook_config = get_config(model=WebhookConfig, root_key="webhook")
+    except KeyError:
+        webhook_config = WebhookConfig()  # Use defaults
+
+    try:
+        database_config = get_config(model=DatabaseConfig, root_key="database")
+    except KeyError:
+        database_config = DatabaseConfig()  # Use defaults
+
+    try:
+        broadcast_config = get_config(model=BroadcastConfig, root_key="broadcast")
+    except KeyError:
+        broadcast_config = BroadcastConfig()  # Use defaults
+
+    try:
+        flood_control_config = get_config(model=FloodControlConfig, root_key="flood_control")
+    except KeyError:
+        flood_control_config = FloodControlConfig()  # Use defaults
+
+    try:
+        scheduler_config = get_config(model=SchedulerConfig, root_key="scheduler")
+    except KeyError:
+        scheduler_config = SchedulerConfig()  # Use defaults
+
+    try:
+        reload_config = get_config(model=ReloadConfig, root_key="reload")
+    except KeyError:
+        reload_config = ReloadConfig()  # Use defaults
+
+    try:
+        metrics_config = get_config(model=MetricsConfig, root_key="metrics")
+    except KeyError:
+        metrics_config = MetricsConfig()  # Use defaults
+
+    try:
+        profiling_config = get_config(model=ProfilingConfig, root_key="profiling")
+    except KeyError:
+        profiling_config = ProfilingConfig()  # Use defaults
+
     bot = Bot(
         token=bot_config.token.get_secret_value(),
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
 
     dp = Dispatcher()
+    dp["log_factory"] = structlog_config["logger_factory"]
+
+    if flood_control_config.enabled:
+        flood_control = FloodControlMiddleware(
+            global_rate=flood_control_config.global_rate,
+            private_chat_interval=flood_control_config.private_chat_interval,
+            group_chat_interval=flood_control_config.group_chat_interval,
+            max_retries=flood_control_config.max_retries,
+        )
+        bot.session.middleware(flood_control)
+        dp["flood_control"] = flood_control
+
+    repo = create_repository(database_config)
+    await repo.init()
+    dp["repo"] = repo
+
+    broadcaster = Broadcaster(
+        bot,
+        repo,
+        checkpoint_path=broadcast_config.checkpoint_path,
+        batch_size=broadcast_config.batch_size,
+        concurrency=broadcast_config.concurrency,
+        progress_interval=broadcast_config.progress_interval,
+    )
+    dp["broadcaster"] = broadcaster
+
+    # Admin filters prefer the index, so the member cache is only created without it
+    admin_index: Optional[ChatAdminIndex] = None
+    if chat_members_config.admin_index:
+        admin_index = ChatAdminIndex(
+            refresh_interval=chat_members_config.admins_refresh_interval,
+            ttl=chat_members_config.admins_ttl,
+            max_chats=chat_members_config.admins_max_chats,
+        )
+        dp["admin_index"] = admin_index
+    else:
+        dp["member_cache"] = ChatMemberCache(
+            ttl=chat_members_config.cache_ttl,
+            max_size=chat_members_config.cache_max_size,
+        )
+
+    if scheduler_config.enabled:
+        scheduler = UpdateScheduler(
+            max_concurrency=scheduler_config.max_concurrency,
+            max_queue_size=scheduler_config.max_queue_size,
+            overflow_policy=scheduler_config.overflow_policy,
+            shutdown_timeout=scheduler_config.shutdown_timeout,
+        )
+        scheduler.setup(dp)
+        dp["scheduler"] = scheduler
 
-    setup_middlewares(dp, l10n_config, throttling_config)
+    l10n_middleware, throttling_middleware = setup_middlewares(
+        dp, l10n_config, throttling_config,
+    )
     register_all_handlers(dp)
 
+    dp["profiler"] = Profiler(
+        max_duration=profiling_config.max_duration,
+        top=profiling_config.top,
+    )
+    loop_monitor: Optional[LoopLagMonitor] = None
+    if profiling_config.loop_monitor:
+        loop_monitor = LoopLagMonitor(threshold=profiling_config.loop_lag_threshold)
+        dp["loop_monitor"] = loop_monitor
+
+    metrics_server: Optional[MetricsServer] = None
+    if metrics_config.enabled:
+        metrics_server = MetricsServer(
+            setup_metrics(dp, throttling_middleware),
+            host=metrics_config.host,
+            port=metrics_config.port,
+            path=metrics_config.path,
+        )
+        dp["metrics_server"] = metrics_server
+
     stop_event = asyncio.Event()
 
     def signal_handler() -> None:
@@ -86,23 +476,36 @@ async def main() -> None:
             pass
 
     await on_startup(bot, logger)
+    if admin_index is not None:
+        admin_index.start(bot)
+    await broadcaster.resume()
+    if metrics_server is not None:
+        await metrics_server.start()
+    if loop_monitor is not None:
+        loop_monitor.start()
 
-    try:
-        polling_task = asyncio.create_task(
-            dp.start_polling(bot, skip_updates=False)
+    if reload_config.enabled:
+        reloader = HotReloader(
+            l10n_middleware,
+            l10n_config,
+            throttling_middleware,
+            interval=reload_config.interval,
         )
+        reloader.start()
+        dp["reloader"] = reloader
 
-        await stop_event.wait()
-        await logger.ainfo("Shutdown signal received...")
-
-        polling_task.cancel()
-        try:
-            await polling_task
-        except asyncio.CancelledError:
-            pass
+    try:
+        if webhook_config.enabled:
+            await run_webhook(dp, bot, stop_event, webhook_config, logger)
+        else:
+            # Scheduler only queues updates, so awaiting it lets backpressure delay the next fetch
+            await run_polling(
+                dp, bot, stop_event, logger,
+                handle_as_tasks=not scheduler_config.enabled,
+            )
 
     finally:
-        await on_shutdown(bot, logger)
+        await on_shutdown(bot, dp, logger)
         await bot.session.close()
 
 
@@ -1,7 +1,13 @@
 from .base import BaseRepository
+from .cached import CachedRepository
+from .compact import CompactMemoryRepository
+from .journal import JournaledRepository
 from .memory import MemoryRepository
 
 __all__ = [
     "BaseRepository",
+    "CachedRepository",
+    "CompactMemoryRepository",
+    "JournaledRepository",
     "MemoryRepository",
 ]
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from operator import itemgetter
+from typing import Any, AsyncIterator, Iterable, Mapping, Optional
 
 
 class BaseRepository(ABC):
@@ -57,6 +58,104 @@ class BaseRepository(ABC):
         """
         ...
 
+    async def get_users(self, user_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+        """
+        Get data of several users at once.
+
+        The default implementation calls get_user() for every ID;
+        override it with a single query where possible.
+
+        Args:
+            user_ids: Telegram user IDs
+
+        Returns:
+            Dict of user ID to user data, users not found are left out
+        """
+        users = {}
+        for user_id in user_ids:
+            user = await self.get_user(user_id)
+            if user is not None:
+                users[user_id] = user
+        return users
+
+    async def save_users(self, users: Mapping[int, dict[str, Any]]) -> None:
+        """
+        Save or update data of several users at once.
+
+        The default implementation calls save_user() for every user;
+        override it with a single transaction where possible.
+
+        Args:
+            users: Dict of user ID to user data to save
+        """
+        for user_id, data in users.items():
+            await self.save_user(user_id, data)
+
+    async def delete_users(self, user_ids: Iterable[int]) -> int:
+        """
+        Delete data of several users at once.
+
+        The default implementation calls delete_user() for every ID;
+        override it with a single transaction where possible.
+
+        Args:
+            user_ids: Telegram user IDs
+
+        Returns:
+            Number of users deleted
+        """
+        deleted = 0
+        for user_id in user_ids:
+            deleted += await self.delete_user(user_id)
+        return deleted
+
+    async def iter_users(
+        self,
+        batch_size: int = 1000,
+        after_id: Optional[int] = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Iterate over users in batches ordered by user ID.
+
+        The default implementation loads all users at once;
+        override it with a paginated query where possible.
+
+        Args:
+            batch_size: Maximum number of users per batch
+            after_id: Only return users with greater ID (to resume iteration)
+
+        Yields:
+            Lists of user data dicts
+        """
+        users = sorted(await self.get_all_users(), key=itemgetter("user_id"))
+        if after_id is not None:
+            users = [user for user in users if user["user_id"] > after_id]
+
+        for i in range(0, len(users), batch_size):
+            yield users[i:i + batch_size]
+
+    async def get_users_page(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 10,
+    ) -> tuple[list[dict[str, Any]], Optional[int]]:
+        """
+        Get a page of users ordered by user ID (keyset pagination).
+
+        Args:
+            cursor: Cursor returned with the previous page, None for the first page
+            limit: Maximum number of users on the page
+
+        Returns:
+            Tuple of user data dicts and cursor of the next page
+            (None if this is the last page)
+        """
+        async for batch in self.iter_users(batch_size=limit + 1, after_id=cursor):
+            if len(batch) > limit:
+                return batch[:limit], batch[limit - 1]["user_id"]
+            return batch, None
+        return [], None
+
     @abstractmethod
     async def count_users(self) -> int:
         """
@@ -67,6 +166,10 @@ class BaseRepository(ABC):
         """
         ...
 
+    async def init(self) -> None:
+        """Open database connection."""
+        pass
+
     async def close(self) -> None:
         """Close database connection."""
         pass
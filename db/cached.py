@@ -0,0 +1,188 @@
+import asyncio
+from functools import partial
+from typing import Any, AsyncIterator, Iterable, Mapping, Optional
+
+from cachetools import TTLCache
+
+from .base import BaseRepository
+
+
+# Cached marker of a user known to be absent from the repository
+_NOT_FOUND = object()
+
+
+class _CountingTTLCache(TTLCache):
+    """TTLCache that counts entries evicted because the cache was full."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+
+    def popitem(self) -> tuple[Any, Any]:
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+
+class CachedRepository(BaseRepository):
+    """
+    Read-through cache in front of any repository.
+
+    Users loaded by ID are kept in a bounded LRU cache for `ttl` seconds,
+    unknown users are cached too, so repeated lookups of them don't hit
+    the database. Writes go straight to the wrapped repository and drop
+    the affected users from cache. Concurrent misses for the same user
+    share one query. Listing and counting queries are not cached.
+
+    Cached user dicts are shared between callers and must not be mutated.
+
+    Usage:
+        repo = CachedRepository(SQLiteRepository("bot.db"), ttl=300, max_size=10000)
+        await repo.init()
+        user = await repo.get_user(user_id)
+    """
+
+    def __init__(self, repo: BaseRepository, ttl: float = 300.0, max_size: int = 10000) -> None:
+        """
+        Args:
+            repo: Repository to cache
+            ttl: Seconds to keep a user in cache
+            max_size: Maximum number of cached users
+        """
+        self.repo = repo
+        self._cache = _CountingTTLCache(maxsize=max_size, ttl=ttl)
+        self._in_flight: dict[int, asyncio.Task] = {}
+        # Bumped on every write, so bulk loads racing with a write aren't cached
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    async def get_user(self, user_id: int) -> Optional[dict[str, Any]]:
+        user = self._cache.get(user_id)
+        if user is not None:
+            self.hits += 1
+            return None if user is _NOT_FOUND else user
+
+        self.misses += 1
+        task = self._in_flight.get(user_id)
+        if task is None:
+            self.loads += 1
+            task = asyncio.create_task(self.repo.get_user(user_id))
+            self._in_flight[user_id] = task
+            task.add_done_callback(partial(self._store, user_id))
+
+        # Shield so that a cancelled waiter doesn't cancel the shared query
+        return await asyncio.shield(task)
+
+    async def get_users(self, user_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+        users = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            user = self._cache.get(user_id)
+            if user is None:
+                missing.append(user_id)
+            elif user is not _NOT_FOUND:
+                users[user_id] = user
+
+        self.hits += len(users)
+        self.misses += len(missing)
+        if not missing:
+            return users
+
+        self.loads += 1
+        version = self._version
+        loaded = await self.repo.get_users(missing)
+        users.update(loaded)
+
+        if version == self._version:
+            for user_id in missing:
+                self._cache[user_id] = loaded.get(user_id, _NOT_FOUND)
+        return users
+
+    async def save_user(self, user_id: int, data: dict[str, Any]) -> None:
+        try:
+            await self.repo.save_user(user_id, data)
+        finally:
+            self.invalidate(user_id)
+
+    async def save_users(self, users: Mapping[int, dict[str, Any]]) -> None:
+        try:
+            await self.repo.save_users(users)
+        finally:
+            self.invalidate(*users)
+
+    async def delete_user(self, user_id: int) -> bool:
+        try:
+            return await self.repo.delete_user(user_id)
+        finally:
+            self.invalidate(user_id)
+
+    async def delete_users(self, user_ids: Iterable[int]) -> int:
+        ids = list(user_ids)
+        try:
+            return await self.repo.delete_users(ids)
+        finally:
+            self.invalidate(*ids)
+
+    async def get_all_users(self) -> list[dict[str, Any]]:
+        return await self.repo.get_all_users()
+
+    async def iter_users(
+        self,
+        batch_size: int = 1000,
+        after_id: Optional[int] = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        async for batch in self.repo.iter_users(batch_size=batch_size, after_id=after_id):
+            yield batch
+
+    async def get_users_page(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 10,
+    ) -> tuple[list[dict[str, Any]], Optional[int]]:
+        return await self.repo.get_users_page(cursor=cursor, limit=limit)
+
+    async def count_users(self) -> int:
+        return await self.repo.count_users()
+
+    async def init(self) -> None:
+        await self.repo.init()
+
+    async def close(self) -> None:
+        self._cache.clear()
+        await self.repo.close()
+
+    def invalidate(self, *user_ids: int) -> None:
+        """Drop users from cache and forget their in-flight loads."""
+        self._version += 1
+        for user_id in user_ids:
+            self._cache.pop(user_id, None)
+            self._in_flight.pop(user_id, None)
+
+    def _store(self, user_id: int, task: asyncio.Task) -> None:
+        if self._in_flight.get(user_id) is not task:
+            return  # Invalidated while loading, the result may be stale
+
+        del self._in_flight[user_id]
+        if not task.cancelled() and task.exception() is None:
+            user = task.result()
+            self._cache[user_id] = _NOT_FOUND if user is None else user
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dict with hits, misses, hit ratio, repository loads,
+            evictions of full cache and current size
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "loads": self.loads,
+            "evictions": self._cache.evictions,
+            "size": len(self._cache),
+        }
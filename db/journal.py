@@ -0,0 +1,363 @@
+"""
+Append-only log and snapshot persistence for in-memory repositories.
+
+Files are `<path>.snapshot` and `<path>.<generation>.log`. Both consist of
+records framed with a fixed struct header followed by a JSON payload:
+
+    op (u8) | user_id (i64) | payload length (u32) | payload crc32 (u32) | payload
+
+The snapshot starts with SNAPSHOT_MAGIC and the generation of the first log
+to replay over it, followed by batch records whose payload is a JSON list of
+[user_id, data] pairs, so loading takes one JSON decode per batch. Every log
+starts with LOG_MAGIC and its own generation.
+"""
+import asyncio
+import json
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable, Iterator, Mapping, Optional, Union
+
+import structlog
+
+from .base import BaseRepository
+
+
+logger = structlog.get_logger()
+
+SNAPSHOT_MAGIC = b"TGBSNAP1"
+LOG_MAGIC = b"TGBLOG01"
+FILE_HEADER = struct.Struct("<8sq")  # magic, generation
+RECORD_HEADER = struct.Struct("<BqII")  # op, user_id, payload length, payload crc32
+
+OP_SAVE = 1
+OP_DELETE = 2
+OP_SAVE_BATCH = 3  # user_id field holds the number of users
+
+LOAD_BATCH_SIZE = 10000
+
+
+def _encode_record(op: int, user_id: int, data: Any = None) -> bytes:
+    payload = json.dumps(data, ensure_ascii=False, default=str).encode() if data else b""
+    return RECORD_HEADER.pack(op, user_id, len(payload), zlib.crc32(payload)) + payload
+
+
+def _iter_records(
+    buffer: Union[bytes, mmap.mmap],
+    offset: int,
+) -> Iterator[tuple[int, int, Any, int]]:
+    """Yield (op, user_id, data, end offset) until the end or a torn record."""
+    size = len(buffer)
+    while offset + RECORD_HEADER.size <= size:
+        op, user_id, length, crc = RECORD_HEADER.unpack_from(buffer, offset)
+        start = offset + RECORD_HEADER.size
+        payload = buffer[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        offset = start + length
+        yield op, user_id, json.loads(payload) if payload else None, offset
+
+
+class JournaledRepository(BaseRepository):
+    """
+    Durable wrapper for MemoryRepository or CompactMemoryRepository.
+
+    Every write is applied in memory and appended to an operation log,
+    which a background task writes and fsyncs every `fsync_interval`
+    seconds, so up to that much of the latest writes can be lost on a
+    crash. Once the log holds `compact_after` records, a new log is
+    started and the whole store is written to a snapshot, after which
+    older logs are removed. On init the snapshot is loaded through mmap
+    and the logs written after it are replayed.
+
+    Usage:
+        repo = JournaledRepository(MemoryRepository(), "data/users")
+        await repo.init()  # loads saved users
+        # ... use repo ...
+        await repo.close()  # writes the log tail
+    """
+
+    def __init__(
+        self,
+        repo: BaseRepository,
+        path: Union[str, Path] = "data/users",
+        fsync_interval: float = 1.0,
+        compact_after: int = 100000,
+    ) -> None:
+        """
+        Args:
+            repo: In-memory repository to persist
+            path: Path prefix of snapshot and log files
+            fsync_interval: Seconds between log writes
+            compact_after: Number of log records that triggers a snapshot
+        """
+        self.repo = repo
+        self.path = Path(path)
+        self.fsync_interval = fsync_interval
+        self.compact_after = compact_after
+        self._generation = 0
+        self._log_file: Optional[Any] = None
+        self._log_records = 0
+        self._buffer = bytearray()
+        self._write_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._compact_task: Optional[asyncio.Task] = None
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.snapshot")
+
+    def _log_path(self, generation: int) -> Path:
+        return self.path.with_name(f"{self.path.name}.{generation}.log")
+
+    async def init(self) -> None:
+        """Load snapshot, replay logs and start background log writes."""
+        await self.repo.init()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        generation = await self._load_snapshot()
+        logs = sorted(
+            (gen, log_path) for gen, log_path in self._find_logs() if gen >= generation
+        )
+        for _, log_path in logs:
+            self._log_records += await self._replay_log(log_path)
+
+        self._generation = logs[-1][0] if logs else generation
+        self._log_file = await asyncio.to_thread(self._open_log, self._generation)
+        self._flush_task = asyncio.create_task(self._flush_periodically())
+
+        await logger.ainfo(
+            "Users loaded from journal",
+            users=await self.repo.count_users(),
+            log_records=self._log_records,
+        )
+
+    async def get_user(self, user_id: int) -> Optional[dict[str, Any]]:
+        return await self.repo.get_user(user_id)
+
+    async def get_users(self, user_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+        return await self.repo.get_users(user_ids)
+
+    async def save_user(self, user_id: int, data: dict[str, Any]) -> None:
+        await self.repo.save_user(user_id, data)
+        self._append(_encode_record(OP_SAVE, user_id, data))
+
+    async def save_users(self, users: Mapping[int, dict[str, Any]]) -> None:
+        await self.repo.save_users(users)
+        for user_id, data in users.items():
+            self._append(_encode_record(OP_SAVE, user_id, data))
+
+    async def delete_user(self, user_id: int) -> bool:
+        deleted = await self.repo.delete_user(user_id)
+        if deleted:
+            self._append(_encode_record(OP_DELETE, user_id))
+        return deleted
+
+    async def delete_users(self, user_ids: Iterable[int]) -> int:
+        ids = list(user_ids)
+        deleted = await self.repo.delete_users(ids)
+        if deleted:
+            for user_id in ids:
+                self._append(_encode_record(OP_DELETE, user_id))
+        return deleted
+
+    async def get_all_users(self) -> list[dict[str, Any]]:
+        return await self.repo.get_all_users()
+
+    async def iter_users(
+        self,
+        batch_size: int = 1000,
+        after_id: Optional[int] = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        async for batch in self.repo.iter_users(batch_size=batch_size, after_id=after_id):
+            yield batch
+
+    async def get_users_page(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 10,
+    ) -> tuple[list[dict[str, Any]], Optional[int]]:
+        return await self.repo.get_users_page(cursor=cursor, limit=limit)
+
+    async def count_users(self) -> int:
+        return await self.repo.count_users()
+
+    async def flush(self) -> None:
+        """Write and fsync appended log records."""
+        async with self._write_lock:
+            if not self._buffer or self._log_file is None:
+                return
+            await self._write_buffer()
+
+    async def compact(self) -> None:
+        """Write a snapshot of all users and remove logs it replaces."""
+        # Writes from now on go to a new log, which is replayed over the snapshot.
+        # Writes that happen while the snapshot is built end up in both, replaying
+        # them again yields the same state.
+        async with self._write_lock:
+            if self._buffer and self._log_file is not None:
+                await self._write_buffer()
+            old_log_file = self._log_file
+            self._generation += 1
+            self._log_file = await asyncio.to_thread(self._open_log, self._generation)
+            self._log_records = 0
+            snapshot_generation = self._generation
+            if old_log_file is not None:
+                old_log_file.close()
+
+        # Copies are taken on the loop, as stored dicts keep changing while the
+        # thread encodes them. Other tasks run between batches.
+        batches = []
+        async for batch in self.repo.iter_users(batch_size=LOAD_BATCH_SIZE):
+            batches.append([user.copy() for user in batch])
+            await asyncio.sleep(0)
+        await asyncio.to_thread(self._write_snapshot, snapshot_generation, batches)
+
+        for generation, log_path in self._find_logs():
+            if generation < snapshot_generation:
+                log_path.unlink(missing_ok=True)
+
+    async def close(self) -> None:
+        if self._compact_task is not None:
+            await self._compact_task
+            self._compact_task = None
+
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        await self.flush()
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+        await self.repo.close()
+
+    async def _write_buffer(self) -> None:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        try:
+            await asyncio.to_thread(self._write_log, self._log_file, data)
+        except OSError:
+            # Keep the records ahead of those appended during the write, for the next flush
+            self._buffer[:0] = data
+            raise
+
+    def _append(self, record: bytes) -> None:
+        self._buffer += record
+        self._log_records += 1
+        if self._log_records >= self.compact_after and self._compact_task is None:
+            self._compact_task = asyncio.create_task(self._compact_in_background())
+
+    async def _compact_in_background(self) -> None:
+        try:
+            await self.compact()
+        except OSError as e:
+            await logger.aerror("Failed to write users snapshot", error=str(e))
+        finally:
+            self._compact_task = None
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.fsync_interval)
+            try:
+                await self.flush()
+            except OSError as e:
+                await logger.aerror("Failed to write users log", error=str(e))
+
+    async def _load_snapshot(self) -> int:
+        """Load snapshot into repository and return generation of the first log to replay."""
+        if not self.snapshot_path.exists():
+            return 0
+
+        # Decoding is the slow part, keep it off the event loop
+        generation, batches = await asyncio.to_thread(self._read_snapshot)
+        for users in batches:
+            await self.repo.save_users(users)
+        return generation
+
+    def _read_snapshot(self) -> tuple[int, list[dict[int, dict[str, Any]]]]:
+        """Decode snapshot into its generation and batches of users."""
+        with open(self.snapshot_path, "rb") as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            magic, generation = FILE_HEADER.unpack_from(buffer, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"Not a users snapshot: {self.snapshot_path}")
+
+            batches = [
+                dict(users)
+                for op, _, users, _ in _iter_records(buffer, FILE_HEADER.size)
+                if op == OP_SAVE_BATCH
+            ]
+        return generation, batches
+
+    async def _replay_log(self, log_path: Path) -> int:
+        data = await asyncio.to_thread(log_path.read_bytes)
+        if len(data) < FILE_HEADER.size or data[:len(LOG_MAGIC)] != LOG_MAGIC:
+            return 0
+
+        count = 0
+        end = FILE_HEADER.size
+        for op, user_id, user, record_end in _iter_records(data, FILE_HEADER.size):
+            if op == OP_SAVE:
+                await self.repo.save_user(user_id, user or {})
+            elif op == OP_DELETE:
+                await self.repo.delete_user(user_id)
+            count += 1
+            end = record_end
+
+        if end < len(data):
+            # Torn write at crash time, drop it so new records follow valid ones
+            await logger.awarning("Truncating damaged users log tail", path=str(log_path))
+            await asyncio.to_thread(os.truncate, log_path, end)
+        return count
+
+    def _find_logs(self) -> list[tuple[int, Path]]:
+        logs = []
+        for log_path in self.path.parent.glob(f"{self.path.name}.*.log"):
+            generation = log_path.name[len(self.path.name) + 1:-len(".log")]
+            if generation.isdigit():
+                logs.append((int(generation), log_path))
+        return logs
+
+    def _open_log(self, generation: int) -> Any:
+        log_path = self._log_path(generation)
+        file = open(log_path, "ab", buffering=0)
+        if file.tell() == 0:
+            file.write(FILE_HEADER.pack(LOG_MAGIC, generation))
+            os.fsync(file.fileno())
+        return file
+
+    @staticmethod
+    def _write_log(file: Any, data: bytes) -> None:
+        offset = file.tell()
+        try:
+            view = memoryview(data)
+            while view:  # unbuffered writes may be partial
+                view = view[file.write(view):]
+            os.fsync(file.fileno())
+        except OSError:
+            # Don't leave a torn record, it would hide the records retried after it
+            try:
+                file.truncate(offset)
+            except OSError:
+                pass
+            raise
+
+    def _write_snapshot(self, generation: int, batches: list[list[dict[str, Any]]]) -> None:
+        tmp_path = self.snapshot_path.with_name(f"{self.snapshot_path.name}.tmp")
+        with open(tmp_path, "wb") as file:
+            file.write(FILE_HEADER.pack(SNAPSHOT_MAGIC, generation))
+            for batch in batches:
+                file.write(_encode_record(OP_SAVE_BATCH, len(batch), [
+                    [user.pop("user_id"), user] for user in batch
+                ]))
+                batch.clear()  # Free copies here, not all at once on the event loop
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.snapshot_path)
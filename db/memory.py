@@ -1,4 +1,5 @@
-from typing import Any, Optional
+from bisect import bisect_right
+from typing import Any, AsyncIterator, Iterable, Mapping, Optional
 
 from .base import BaseRepository
 
@@ -13,6 +14,8 @@ class MemoryRepository(BaseRepository):
 
     def __init__(self) -> None:
         self._users: dict[int, dict[str, Any]] = {}
+        # Sorted user IDs for keyset pagination, rebuilt after users are added or removed
+        self._sorted_ids: Optional[list[int]] = None
 
     async def get_user(self, user_id: int) -> Optional[dict[str, Any]]:
         return self._users.get(user_id)
@@ -22,15 +25,73 @@ class MemoryRepository(BaseRepository):
             self._users[user_id].update(data)
         else:
             self._users[user_id] = {"user_id": user_id, **data}
+            self._sorted_ids = None
 
     async def delete_user(self, user_id: int) -> bool:
         if user_id in self._users:
             del self._users[user_id]
+            self._sorted_ids = None
             return True
         return False
 
+    async def get_users(self, user_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+        users = self._users
+        return {user_id: users[user_id] for user_id in user_ids if user_id in users}
+
+    async def save_users(self, users: Mapping[int, dict[str, Any]]) -> None:
+        stored = self._users
+        for user_id, data in users.items():
+            user = stored.get(user_id)
+            if user is not None:
+                user.update(data)
+            else:
+                stored[user_id] = {"user_id": user_id, **data}
+                self._sorted_ids = None
+
+    async def delete_users(self, user_ids: Iterable[int]) -> int:
+        stored = self._users
+        deleted = sum(stored.pop(user_id, None) is not None for user_id in set(user_ids))
+        if deleted:
+            self._sorted_ids = None
+        return deleted
+
     async def get_all_users(self) -> list[dict[str, Any]]:
         return list(self._users.values())
 
+    async def iter_users(
+        self,
+        batch_size: int = 1000,
+        after_id: Optional[int] = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        ids = self._get_sorted_ids()
+        start = 0 if after_id is None else bisect_right(ids, after_id)
+
+        for i in range(start, len(ids), batch_size):
+            # Users might have been deleted while iterating
+            batch = [
+                self._users[user_id]
+                for user_id in ids[i:i + batch_size]
+                if user_id in self._users
+            ]
+            if batch:
+                yield batch
+
+    async def get_users_page(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 10,
+    ) -> tuple[list[dict[str, Any]], Optional[int]]:
+        ids = self._get_sorted_ids()
+        start = 0 if cursor is None else bisect_right(ids, cursor)
+        page_ids = ids[start:start + limit]
+
+        next_cursor = page_ids[-1] if start + limit < len(ids) else None
+        return [self._users[user_id] for user_id in page_ids], next_cursor
+
     async def count_users(self) -> int:
         return len(self._users)
+
+    def _get_sorted_ids(self) -> list[int]:
+        if self._sorted_ids is None:
+            self._sorted_ids = sorted(self._users)
+        return self._sorted_ids
@@ -3,7 +3,13 @@ SQLite repository implementation.
 
 Requires: pip install aiosqlite
 """
-from typing import Any, Optional
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+from time import monotonic
+from typing import Any, AsyncIterator, Iterable, Mapping, Optional
+
+import structlog
 
 try:
     import aiosqlite
@@ -13,28 +19,113 @@ except ImportError:
 from .base import BaseRepository
 
 
+logger = structlog.get_logger()
+
+JOURNAL_MODES = {"delete", "truncate", "persist", "memory", "wal", "off"}
+SYNCHRONOUS_MODES = {"off", "normal", "full", "extra"}
+
+# Stays below the lowest SQLITE_MAX_VARIABLE_NUMBER (999 before SQLite 3.32)
+IN_CHUNK_SIZE = 500
+
+
+class _PendingWrite:
+    """Coalesced not yet flushed writes of a single user."""
+
+    __slots__ = ("delete", "data")
+
+    def __init__(self) -> None:
+        self.delete = False  # Row is deleted before data is written
+        self.data: Optional[dict[str, Any]] = None
+
+
 class SQLiteRepository(BaseRepository):
     """
     SQLite repository implementation using aiosqlite.
 
+    In write-behind mode save_user() and delete_user() only queue changes:
+    writes are coalesced per user and flushed in a single transaction when
+    `write_batch_size` users are queued or every `flush_interval` seconds.
+    Reads by user ID see queued changes, other reads flush first.
+    Queued changes are lost if the process dies before they are flushed.
+
+    The writer connection has one transaction at a time, so every write
+    holds a lock from its first statement to commit or rollback, otherwise
+    one call's commit or rollback would end another's transaction.
+
+    In WAL mode reads go to a pool of `readers` read-only connections,
+    each with its own thread, so they don't queue behind writes on the
+    single writer connection. Readers are reopened after `reader_max_lifetime`
+    seconds. With other journal modes or in-memory databases everything
+    goes through the writer.
+
     Usage:
-        repo = SQLiteRepository("bot.db")
+        repo = SQLiteRepository("bot.db", readers=4, write_behind=True)
         await repo.init()
         # ... use repo ...
-        await repo.close()
+        await repo.close()  # flushes queued writes
     """
 
-    def __init__(self, db_path: str = "bot.db") -> None:
+    def __init__(
+        self,
+        db_path: str = "bot.db",
+        journal_mode: str = "wal",
+        synchronous: str = "normal",
+        mmap_size: int = 0,
+        cache_size: int = -2000,
+        write_behind: bool = False,
+        write_batch_size: int = 500,
+        flush_interval: float = 1.0,
+        readers: int = 2,
+        acquire_timeout: float = 5.0,
+        reader_max_lifetime: float = 3600.0,
+    ) -> None:
+        """
+        Args:
+            db_path: Path to database file
+            journal_mode: SQLite journal_mode pragma
+            synchronous: SQLite synchronous pragma
+            mmap_size: Bytes of database file to memory-map (0 disables)
+            cache_size: Page cache size, pages if positive, KiB if negative
+            write_behind: Queue writes and flush them in batches
+            write_batch_size: Number of queued users that triggers a flush
+            flush_interval: Maximum seconds a write stays queued
+            readers: Number of read-only connections used in WAL mode
+            acquire_timeout: Seconds to wait for a free reader or a database lock
+            reader_max_lifetime: Seconds after which a reader connection is reopened
+        """
         if aiosqlite is None:
             raise ImportError("aiosqlite is required. Install with: pip install aiosqlite")
 
+        if journal_mode.lower() not in JOURNAL_MODES:
+            raise ValueError(f"Unknown journal_mode: {journal_mode}")
+        if synchronous.lower() not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Unknown synchronous mode: {synchronous}")
+
         self.db_path = db_path
-        self._conn: Optional[aiosqlite.Connection] = None
+        self.pragmas = {
+            "journal_mode": journal_mode.lower(),
+            "synchronous": synchronous.lower(),
+            "mmap_size": int(mmap_size),
+            "cache_size": int(cache_size),
+        }
+        self.write_behind = write_behind
+        self.write_batch_size = write_batch_size
+        self.flush_interval = flush_interval
+        self.readers = readers
+        self.acquire_timeout = acquire_timeout
+        self.reader_max_lifetime = reader_max_lifetime
+        self._conn: Optional[aiosqlite.Connection] = None  # Writer
+        self._readers: Optional[asyncio.Queue[aiosqlite.Connection]] = None
+        self._reader_opened_at: dict[aiosqlite.Connection, float] = {}
+
+        self._pending: dict[int, _PendingWrite] = {}
+        self._flushing: dict[int, _PendingWrite] = {}
+        self._write_lock = asyncio.Lock()  # Held by every transaction of the writer
+        self._flush_task: Optional[asyncio.Task] = None
 
     async def init(self) -> None:
-        """Initialize database connection and create tables."""
-        self._conn = await aiosqlite.connect(self.db_path)
-        self._conn.row_factory = aiosqlite.Row
+        """Initialize database connections and create tables."""
+        self._conn = await self._connect(self.pragmas)
 
         await self._conn.execute("""
             CREATE TABLE IF NOT EXISTS users (
@@ -43,72 +134,407 @@ class SQLiteRepository(BaseRepository):
                 first_name TEXT,
                 last_name TEXT,
                 language_code TEXT,
+                locale TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        # Databases created before the locale preference was added
+        async with self._conn.execute("PRAGMA table_info(users)") as cursor:
+            columns = {row["name"] for row in await cursor.fetchall()}
+        if "locale" not in columns:
+            await self._conn.execute("ALTER TABLE users ADD COLUMN locale TEXT")
         await self._conn.commit()
 
+        # Separate connections only see the same database in WAL mode on a file
+        use_readers = self.pragmas["journal_mode"] == "wal" and self.db_path != ":memory:"
+        if use_readers and self.readers > 0:
+            self._readers = asyncio.Queue()
+            for _ in range(self.readers):
+                self._readers.put_nowait(await self._connect_reader())
+
+        if self.write_behind:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
     async def get_user(self, user_id: int) -> Optional[dict[str, Any]]:
         if self._conn is None:
             raise RuntimeError("Database not initialized. Call init() first.")
 
-        async with self._conn.execute(
+        # Taken before the query, as a flush may complete while it runs
+        writes = [
+            layer[user_id]
+            for layer in (self._flushing, self._pending)
+            if user_id in layer
+        ]
+
+        async with self._read_conn() as conn, conn.execute(
             "SELECT * FROM users WHERE user_id = ?",
             (user_id,),
         ) as cursor:
             row = await cursor.fetchone()
-            if row:
-                return dict(row)
-            return None
+            user = dict(row) if row else None
+
+        return self._apply_writes(user_id, user, writes)
 
     async def save_user(self, user_id: int, data: dict[str, Any]) -> None:
         if self._conn is None:
             raise RuntimeError("Database not initialized. Call init() first.")
 
-        columns = ["user_id"] + list(data.keys())
-        placeholders = ", ".join(["?"] * len(columns))
-        updates = ", ".join([f"{k} = ?" for k in data.keys()])
+        if self.write_behind:
+            write = self._queue_write(user_id)
+            write.data = {**(write.data or {}), **data}
+            await self._flush_if_full()
+            return
 
-        values = [user_id] + list(data.values())
-        update_values = list(data.values())
-
-        await self._conn.execute(f"""
-            INSERT INTO users ({', '.join(columns)})
-            VALUES ({placeholders})
-            ON CONFLICT(user_id) DO UPDATE SET
-            {updates}, updated_at = CURRENT_TIMESTAMP
-        """, values + update_values)
-        await self._conn.commit()
+        async with self._write_lock:
+            try:
+                await self._conn.execute(*self._upsert_query(user_id, data))
+                await self._conn.commit()
+            except Exception:
+                await self._conn.rollback()
+                raise
 
     async def delete_user(self, user_id: int) -> bool:
         if self._conn is None:
             raise RuntimeError("Database not initialized. Call init() first.")
 
-        cursor = await self._conn.execute(
-            "DELETE FROM users WHERE user_id = ?",
-            (user_id,),
-        )
-        await self._conn.commit()
+        if self.write_behind:
+            existed = await self.get_user(user_id) is not None
+            write = self._queue_write(user_id)
+            write.delete = True
+            write.data = None
+            await self._flush_if_full()
+            return existed
+
+        async with self._write_lock:
+            try:
+                cursor = await self._conn.execute(
+                    "DELETE FROM users WHERE user_id = ?",
+                    (user_id,),
+                )
+                await self._conn.commit()
+            except Exception:
+                await self._conn.rollback()
+                raise
         return cursor.rowcount > 0
 
+    async def get_users(self, user_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+        if self._conn is None:
+            raise RuntimeError("Database not initialized. Call init() first.")
+
+        ids = list(dict.fromkeys(user_ids))
+        layers = [layer for layer in (self._flushing, self._pending) if layer]
+        writes = {
+            user_id: [layer[user_id] for layer in layers if user_id in layer]
+            for user_id in ids
+        } if layers else {}
+
+        users = {}
+        async with self._read_conn() as conn:
+            for i in range(0, len(ids), IN_CHUNK_SIZE):
+                chunk = ids[i:i + IN_CHUNK_SIZE]
+                placeholders = ", ".join(["?"] * len(chunk))
+                async with conn.execute(
+                    f"SELECT * FROM users WHERE user_id IN ({placeholders})",
+                    chunk,
+                ) as cursor:
+                    for row in await cursor.fetchall():
+                        users[row["user_id"]] = dict(row)
+
+        if not writes:
+            return users
+
+        result = {}
+        for user_id in ids:
+            user = self._apply_writes(user_id, users.get(user_id), writes[user_id])
+            if user is not None:
+                result[user_id] = user
+        return result
+
+    async def save_users(self, users: Mapping[int, dict[str, Any]]) -> None:
+        if self._conn is None:
+            raise RuntimeError("Database not initialized. Call init() first.")
+
+        if self.write_behind:
+            for user_id, data in users.items():
+                write = self._queue_write(user_id)
+                write.data = {**(write.data or {}), **data}
+            await self._flush_if_full()
+            return
+
+        writes = {}
+        for user_id, data in users.items():
+            write = writes[user_id] = _PendingWrite()
+            write.data = data
+        async with self._write_lock:
+            await self._write_batch(writes)
+
+    async def delete_users(self, user_ids: Iterable[int]) -> int:
+        if self._conn is None:
+            raise RuntimeError("Database not initialized. Call init() first.")
+
+        ids = list(dict.fromkeys(user_ids))
+
+        if self.write_behind:
+            existing = await self.get_users(ids)
+            for user_id in ids:
+                write = self._queue_write(user_id)
+                write.delete = True
+                write.data = None
+            await self._flush_if_full()
+            return len(existing)
+
+        deleted = 0
+        async with self._write_lock:
+            try:
+                for i in range(0, len(ids), IN_CHUNK_SIZE):
+                    chunk = ids[i:i + IN_CHUNK_SIZE]
+                    placeholders = ", ".join(["?"] * len(chunk))
+                    cursor = await self._conn.execute(
+                        f"DELETE FROM users WHERE user_id IN ({placeholders})",
+                        chunk,
+                    )
+                    deleted += cursor.rowcount
+                await self._conn.commit()
+            except Exception:
+                await self._conn.rollback()
+                raise
+        return deleted
+
     async def get_all_users(self) -> list[dict[str, Any]]:
         if self._conn is None:
             raise RuntimeError("Database not initialized. Call init() first.")
 
-        async with self._conn.execute("SELECT * FROM users") as cursor:
+        await self.flush()
+        async with self._read_conn() as conn, conn.execute("SELECT * FROM users") as cursor:
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
 
+    async def iter_users(
+        self,
+        batch_size: int = 1000,
+        after_id: Optional[int] = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        while True:
+            batch, after_id = await self.get_users_page(after_id, batch_size)
+            if batch:
+                yield batch
+            if after_id is None:
+                return
+
+    async def get_users_page(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 10,
+    ) -> tuple[list[dict[str, Any]], Optional[int]]:
+        if self._conn is None:
+            raise RuntimeError("Database not initialized. Call init() first.")
+
+        await self.flush()
+
+        # Keyset pagination: seek by primary key instead of scanning with OFFSET
+        if cursor is None:
+            query = "SELECT * FROM users ORDER BY user_id LIMIT ?"
+            params: tuple[int, ...] = (limit + 1,)
+        else:
+            query = "SELECT * FROM users WHERE user_id > ? ORDER BY user_id LIMIT ?"
+            params = (cursor, limit + 1)
+
+        async with self._read_conn() as conn, conn.execute(query, params) as db_cursor:
+            rows = await db_cursor.fetchall()
+
+        users = [dict(row) for row in rows[:limit]]
+        next_cursor = users[-1]["user_id"] if len(rows) > limit else None
+        return users, next_cursor
+
     async def count_users(self) -> int:
         if self._conn is None:
             raise RuntimeError("Database not initialized. Call init() first.")
 
-        async with self._conn.execute("SELECT COUNT(*) FROM users") as cursor:
+        await self.flush()
+        async with self._read_conn() as conn, conn.execute("SELECT COUNT(*) FROM users") as cursor:
             row = await cursor.fetchone()
             return row[0] if row else 0
 
+    async def flush(self) -> None:
+        """Write all queued changes in a single transaction."""
+        if not self._pending or self._conn is None:
+            return
+
+        async with self._write_lock:
+            if not self._pending:
+                return
+
+            self._flushing, self._pending = self._pending, {}
+            try:
+                await self._write_batch(self._flushing)
+            except Exception:
+                # Put changes back under the ones queued since, to retry on next flush
+                for user_id, write in self._pending.items():
+                    self._merge_write(self._flushing, user_id, write)
+                self._pending = self._flushing
+                raise
+            finally:
+                self._flushing = {}
+
     async def close(self) -> None:
-        if self._conn:
-            await self._conn.close()
-            self._conn = None
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                await logger.aerror("SQLite flush task failed", error=str(e))
+            self._flush_task = None
+
+        try:
+            if self._conn:
+                try:
+                    await self.flush()
+                finally:
+                    await self._conn.close()
+                    self._conn = None
+        finally:
+            # Includes readers currently in use, their queries fail from now on
+            for conn in self._reader_opened_at:
+                await conn.close()
+            self._reader_opened_at.clear()
+            self._readers = None
+
+    async def _connect(self, pragmas: dict[str, Any]) -> "aiosqlite.Connection":
+        conn = await aiosqlite.connect(self.db_path)
+        conn.row_factory = aiosqlite.Row
+        await conn.execute(f"PRAGMA busy_timeout = {int(self.acquire_timeout * 1000)}")
+        for name, value in pragmas.items():
+            await conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    async def _connect_reader(self) -> "aiosqlite.Connection":
+        # journal_mode is a property of the database file, set by the writer
+        conn = await self._connect({
+            "mmap_size": self.pragmas["mmap_size"],
+            "cache_size": self.pragmas["cache_size"],
+            "query_only": 1,
+        })
+        self._reader_opened_at[conn] = monotonic()
+        return conn
+
+    @asynccontextmanager
+    async def _read_conn(self) -> AsyncIterator["aiosqlite.Connection"]:
+        if self._readers is None:
+            assert self._conn is not None
+            # Don't read uncommitted rows of a write that may still roll back
+            async with self._write_lock:
+                yield self._conn
+            return
+
+        readers = self._readers
+        try:
+            conn = await asyncio.wait_for(readers.get(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("No free SQLite reader connection") from None
+
+        try:
+            if monotonic() - self._reader_opened_at[conn] > self.reader_max_lifetime:
+                conn = await self._reopen_reader(conn)
+            yield conn
+        finally:
+            readers.put_nowait(conn)
+
+    async def _reopen_reader(self, conn: "aiosqlite.Connection") -> "aiosqlite.Connection":
+        try:
+            new_conn = await self._connect_reader()
+        except sqlite3.Error:
+            # Keep serving reads with the old connection, retry on next acquire
+            return conn
+
+        del self._reader_opened_at[conn]
+        await conn.close()
+        return new_conn
+
+    def _queue_write(self, user_id: int) -> _PendingWrite:
+        write = self._pending.get(user_id)
+        if write is None:
+            write = self._pending[user_id] = _PendingWrite()
+        return write
+
+    @staticmethod
+    def _apply_writes(
+        user_id: int,
+        user: Optional[dict[str, Any]],
+        writes: list[_PendingWrite],
+    ) -> Optional[dict[str, Any]]:
+        for write in writes:
+            if write.delete:
+                user = None
+            if write.data is not None:
+                user = {**(user or {"user_id": user_id}), **write.data}
+        return user
+
+    @staticmethod
+    def _merge_write(writes: dict[int, _PendingWrite], user_id: int, newer: _PendingWrite) -> None:
+        write = writes.setdefault(user_id, _PendingWrite())
+        if newer.delete:
+            write.delete = True
+            write.data = None
+        if newer.data is not None:
+            write.data = {**(write.data or {}), **newer.data}
+
+    async def _flush_if_full(self) -> None:
+        if len(self._pending) >= self.write_batch_size:
+            await self.flush()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                # flush() keeps the failed batch queued, it is retried next time
+                await logger.aerror(
+                    "Failed to write queued users",
+                    pending=len(self._pending),
+                    error=str(e),
+                )
+
+    async def _write_batch(self, writes: dict[int, _PendingWrite]) -> None:
+        # Callers hold _write_lock
+        assert self._conn is not None
+
+        deleted = [(user_id,) for user_id, write in writes.items() if write.delete]
+
+        # executemany needs the same statement, so group upserts by column set
+        upserts: dict[tuple[str, ...], list[list[Any]]] = {}
+        for user_id, write in writes.items():
+            if write.data is not None:
+                _, values = self._upsert_query(user_id, write.data)
+                upserts.setdefault(tuple(write.data), []).append(values)
+
+        try:
+            if deleted:
+                await self._conn.executemany("DELETE FROM users WHERE user_id = ?", deleted)
+            for columns, rows in upserts.items():
+                query, _ = self._upsert_query(0, dict.fromkeys(columns))
+                await self._conn.executemany(query, rows)
+            await self._conn.commit()
+        except Exception:
+            await self._conn.rollback()
+            raise
+
+    @staticmethod
+    def _upsert_query(user_id: int, data: dict[str, Any]) -> tuple[str, list[Any]]:
+        columns = ["user_id"] + list(data.keys())
+        placeholders = ", ".join(["?"] * len(columns))
+        updates = ", ".join([f"{k} = ?" for k in data.keys()] + ["updated_at = CURRENT_TIMESTAMP"])
+
+        values = [user_id] + list(data.values())
+        update_values = list(data.values())
+
+        query = f"""
+            INSERT INTO users ({', '.join(columns)})
+            VALUES ({placeholders})
+            ON CONFLICT(user_id) DO UPDATE SET
+            {updates}
+        """
+        return query, values + update_values
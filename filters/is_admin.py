@@ -1,12 +1,17 @@
 from aiogram.filters import BaseFilter
-from aiogram.types import Message, CallbackQuery
-from typing import Union
+from aiogram.types import CallbackQuery, ChatMemberAdministrator, ChatMemberOwner, Message
+from typing import Optional, Union
+
+from utils import ChatAdminIndex, ChatMemberCache
 
 
 class IsAdminFilter(BaseFilter):
     """
     Filter that checks if user has admin rights in the chat.
 
+    Uses `admin_index` from dispatcher data, or `member_cache` when there
+    is no index, otherwise asks Bot API on every call.
+
     Usage:
         @router.message(IsAdminFilter())  # Only admins
         @router.message(IsAdminFilter(is_admin=False))  # Only non-admins
@@ -19,7 +24,12 @@ class IsAdminFilter(BaseFilter):
         """
         self.is_admin = is_admin
 
-    async def __call__(self, event: Union[Message, CallbackQuery]) -> bool:
+    async def __call__(
+        self,
+        event: Union[Message, CallbackQuery],
+        admin_index: Optional[ChatAdminIndex] = None,
+        member_cache: Optional[ChatMemberCache] = None,
+    ) -> bool:
         if event.from_user is None:
             return False
 
@@ -30,8 +40,15 @@ class IsAdminFilter(BaseFilter):
         else:
             chat_id = event.chat.id
 
-        member = await event.bot.get_chat_member(chat_id, event.from_user.id)
-        user_is_admin = member.is_chat_admin()
+        if admin_index is not None:
+            admins = await admin_index.get_admins(event.bot, chat_id)
+            user_is_admin = event.from_user.id in admins
+        elif member_cache is not None:
+            member = await member_cache.get_member(event.bot, chat_id, event.from_user.id)
+            user_is_admin = isinstance(member, (ChatMemberAdministrator, ChatMemberOwner))
+        else:
+            member = await event.bot.get_chat_member(chat_id, event.from_user.id)
+            user_is_admin = isinstance(member, (ChatMemberAdministrator, ChatMemberOwner))
 
         if self.is_admin:
             return user_is_admin
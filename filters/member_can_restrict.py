@@ -1,7 +1,9 @@
-from typing import Union
+from typing import Optional, Union
 
 from aiogram.filters import BaseFilter
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import CallbackQuery, ChatMember, ChatMemberOwner, Message
+
+from utils import ChatAdminIndex, ChatMemberCache
 
 
 class MemberCanRestrictFilter(BaseFilter):
@@ -11,6 +13,9 @@ class MemberCanRestrictFilter(BaseFilter):
     Note: Chat creators always have restrict permissions, even if
     Telegram API doesn't explicitly report it.
 
+    Uses `admin_index` from dispatcher data, or `member_cache` when there
+    is no index, otherwise asks Bot API on every call.
+
     Usage:
         @router.message(MemberCanRestrictFilter())  # Can restrict
         @router.message(MemberCanRestrictFilter(can_restrict=False))  # Cannot restrict
@@ -23,7 +28,12 @@ class MemberCanRestrictFilter(BaseFilter):
         """
         self.can_restrict = can_restrict
 
-    async def __call__(self, event: Union[Message, CallbackQuery]) -> bool:
+    async def __call__(
+        self,
+        event: Union[Message, CallbackQuery],
+        admin_index: Optional[ChatAdminIndex] = None,
+        member_cache: Optional[ChatMemberCache] = None,
+    ) -> bool:
         if event.from_user is None:
             return False
 
@@ -34,10 +44,18 @@ class MemberCanRestrictFilter(BaseFilter):
         else:
             chat_id = event.chat.id
 
-        member = await event.bot.get_chat_member(chat_id, event.from_user.id)
+        member: Optional[ChatMember]
+        if admin_index is not None:
+            # Only administrators can restrict, so non-admins are simply absent
+            admins = await admin_index.get_admins(event.bot, chat_id)
+            member = admins.get(event.from_user.id)
+        elif member_cache is not None:
+            member = await member_cache.get_member(event.bot, chat_id, event.from_user.id)
+        else:
+            member = await event.bot.get_chat_member(chat_id, event.from_user.id)
 
-        user_can_restrict = (
-            member.is_chat_creator() or
+        user_can_restrict = member is not None and (
+            isinstance(member, ChatMemberOwner) or
             getattr(member, "can_restrict_members", False)
         )
 
@@ -1,7 +1,128 @@
 from pathlib import Path
-from typing import Optional, Union
+from typing import Any, Generator, Optional, Union
 
-from fluent.runtime import FluentLocalization, FluentResourceLoader
+from cachetools import LRUCache
+from fluent.runtime import FluentBundle, FluentLocalization, FluentResourceLoader
+from fluent.syntax import ast as FTL
+
+
+_UNRESOLVED = object()
+
+
+class _CachedResourceLoader(FluentResourceLoader):
+    """Resource loader that reads and parses each file only once."""
+
+    def __init__(self, roots: Union[str, list[str]], strict: bool = False) -> None:
+        super().__init__(roots)
+        self.strict = strict
+        self._cache: dict[tuple[str, tuple[str, ...]], list[list[Any]]] = {}
+
+    def resources(
+        self,
+        locale: str,
+        resource_ids: list[str],
+    ) -> Generator[list[Any], None, None]:
+        key = (locale, tuple(resource_ids))
+        if key not in self._cache:
+            self._cache[key] = list(super().resources(locale, resource_ids))
+            if self.strict:
+                self._check_syntax(locale, self._cache[key])
+        yield from self._cache[key]
+
+    @staticmethod
+    def _check_syntax(locale: str, resources: list[list[Any]]) -> None:
+        for resource in (r for group in resources for r in group):
+            for entry in resource.body:
+                if isinstance(entry, FTL.Junk):
+                    errors = "; ".join(annotation.message for annotation in entry.annotations)
+                    raise ValueError(f"Syntax error in '{locale}' locale: {errors}")
+
+
+class CachedFluentLocalization(FluentLocalization):
+    """
+    FluentLocalization that caches message lookups and formatting results.
+
+    Messages that format without arguments are resolved once and kept as
+    plain strings. For other messages the bundle and compiled pattern are
+    remembered, so fallback bundles aren't searched again, and results
+    can be kept in a bounded LRU cache keyed by message ID and arguments.
+
+    Usage:
+        l10n = CachedFluentLocalization(["ru", "en"], ["{locale}.ftl"], loader, cache_size=1024)
+        l10n.precompile()
+        l10n.format_value("hello-msg")
+    """
+
+    def __init__(self, *args: Any, cache_size: int = 0, **kwargs: Any) -> None:
+        """
+        Args:
+            cache_size: Maximum number of cached results of messages with
+                arguments, 0 disables the cache. Only pays off when the same
+                arguments repeat, every miss costs an LRU insert
+            *args, **kwargs: FluentLocalization arguments
+        """
+        super().__init__(*args, **kwargs)
+        self._static: dict[str, str] = {}
+        self._patterns: dict[str, Optional[tuple[FluentBundle, Any]]] = {}
+        self._formatted: Optional[LRUCache] = LRUCache(maxsize=cache_size) if cache_size else None
+
+    def format_value(self, msg_id: str, args: Optional[dict[str, Any]] = None) -> str:
+        static = self._static.get(msg_id)
+        if static is not None:
+            return static
+
+        entry = self._patterns.get(msg_id, _UNRESOLVED)
+        if entry is _UNRESOLVED:
+            entry = self._resolve(msg_id)
+            static = self._static.get(msg_id)
+            if static is not None:
+                return static
+        if entry is None:
+            return msg_id
+
+        key = None
+        if self._formatted is not None and args:
+            try:
+                key = (msg_id, frozenset(args.items()))
+                value = self._formatted.get(key)
+            except TypeError:  # Unhashable argument
+                key = value = None
+            if value is not None:
+                return value
+
+        bundle, pattern = entry
+        value, _errors = bundle.format_pattern(pattern, args)
+        if key is not None:
+            self._formatted[key] = value
+        return value
+
+    def precompile(self) -> None:
+        """Resolve and compile all messages of all locales in the fallback chain."""
+        for locale in self.locales:
+            for resources in self.resource_loader.resources(locale, self.resource_ids):
+                for resource in resources:
+                    for entry in resource.body:
+                        if isinstance(entry, FTL.Message) and entry.id.name not in self._patterns:
+                            self._resolve(entry.id.name)
+
+    def _resolve(self, msg_id: str) -> Optional[tuple[FluentBundle, Any]]:
+        entry = None
+        for bundle in self._bundles():
+            if not bundle.has_message(msg_id):
+                continue
+            message = bundle.get_message(msg_id)  # Compiles the message
+            if not message.value:
+                continue
+
+            entry = (bundle, message.value)
+            # Formats the same without arguments, e.g. uses no variables
+            value, errors = bundle.format_pattern(message.value)
+            if not errors:
+                self._static[msg_id] = value
+            break
+
+        self._patterns[msg_id] = entry
+        return entry
 
 
 def get_fluent_localization(
@@ -48,3 +169,58 @@ def get_fluent_localization(
         resource_ids=[str(locale_file.absolute())],
         resource_loader=loader,
     )
+
+
+def get_fluent_localizations(
+    locales_dir: Optional[Union[str, Path]] = None,
+    fallback_locale: str = "en",
+    cache_size: int = 0,
+    strict: bool = False,
+) -> dict[str, FluentLocalization]:
+    """
+    Load all Fluent localization files of a directory.
+
+    Every `<locale>.ftl` file becomes a localization that falls back to
+    `fallback_locale` for missing messages. All files are parsed and
+    messages are compiled right away, so formatting never touches the disk.
+
+    Args:
+        locales_dir: Path to localization directory
+        fallback_locale: Locale used for messages missing in other locales
+        cache_size: Formatted messages with arguments cached per locale
+        strict: Raise ValueError on syntax errors instead of skipping broken entries
+
+    Returns:
+        Dict of locale code to FluentLocalization
+
+    Raises:
+        FileNotFoundError: If localization directory or fallback locale file not found
+        ValueError: If a file has syntax errors in strict mode
+    """
+    if locales_dir is None:
+        locales_dir = Path(__file__).parent / "l10n"
+    elif isinstance(locales_dir, str):
+        locales_dir = Path(locales_dir)
+
+    if not locales_dir.is_dir():
+        raise FileNotFoundError(f"Localization directory not found: {locales_dir}")
+
+    codes = sorted(path.stem for path in locales_dir.glob("*.ftl"))
+    if fallback_locale not in codes:
+        raise FileNotFoundError(
+            f"No locale file found for fallback locale '{fallback_locale}' in {locales_dir}"
+        )
+
+    loader = _CachedResourceLoader(str(locales_dir.absolute()), strict=strict)
+    localizations = {}
+    for code in codes:
+        localization = CachedFluentLocalization(
+            locales=[code] if code == fallback_locale else [code, fallback_locale],
+            resource_ids=["{locale}.ftl"],
+            resource_loader=loader,
+            cache_size=cache_size,
+        )
+        localization.precompile()
+        localizations[code] = localization
+
+    return localizations
@@ -1,14 +1,26 @@
+from html import escape
+from math import ceil, isfinite
+from typing import Any, Optional
+
 import structlog
 from aiogram import Router, F
-from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import Command, CommandObject
+from aiogram.types import BufferedInputFile, CallbackQuery, InlineKeyboardMarkup, Message
 from fluent.runtime import FluentLocalization
 
+from db import BaseRepository
 from filters import IsOwnerFilter
+from keyboards import PaginationCallback, get_cursor_pagination_kb
+from utils import Broadcaster, BroadcastState, ProfileKind, Profiler
 
 
 router = Router(name="admin")
 router.message.filter(F.chat.type == "private", IsOwnerFilter())
+router.callback_query.filter(IsOwnerFilter())
+
+USERS_PAGE_SIZE = 10
+PROFILE_DEFAULT_DURATION = 30.0
 
 logger = structlog.get_logger()
 
@@ -29,7 +41,199 @@ async def cmd_ping(message: Message, l10n: FluentLocalization) -> None:
     await message.reply(l10n.format_value("ping-msg"))
 
 
-@router.message(Command("stats"))
+@router.message(Command("stats"), flags={"throttling": {"rate_limit": 10, "burst": 1}})
 async def cmd_stats(message: Message, l10n: FluentLocalization) -> None:
     """Handle /stats command - show bot statistics."""
     await message.answer(l10n.format_value("stats-msg"))
+
+
+@router.message(Command("profile"))
+async def cmd_profile(
+    message: Message,
+    command: CommandObject,
+    l10n: FluentLocalization,
+    profiler: Profiler,
+) -> None:
+    """
+    Handle /profile command - capture a CPU or memory profile.
+
+    Usage: /profile [cpu|memory] [seconds], the report is sent as a document.
+    """
+    if profiler.running:
+        await message.answer(
+            l10n.format_value("profile-already-running", {"kind": profiler.kind.value})
+        )
+        return
+
+    args = (command.args or "").split()
+    try:
+        kind = ProfileKind(args[0].lower()) if args else ProfileKind.CPU
+        duration = float(args[1]) if len(args) > 1 else PROFILE_DEFAULT_DURATION
+        if not isfinite(duration):  # float() accepts "nan" and "inf"
+            raise ValueError(duration)
+    except ValueError:
+        await message.answer(
+            l10n.format_value("profile-usage", {"max": int(profiler.max_duration)})
+        )
+        return
+
+    async def send_report(report: str) -> None:
+        await message.answer_document(
+            BufferedInputFile(report.encode(), filename=f"profile-{kind.value}.txt"),
+            caption=l10n.format_value("profile-report", {"kind": kind.value}),
+        )
+
+    duration = profiler.start(kind, duration, send_report)
+    await logger.ainfo(
+        "Profiling started",
+        kind=kind.value,
+        duration=duration,
+        user_id=message.from_user.id if message.from_user else None,
+    )
+    await message.answer(
+        l10n.format_value("profile-started", {"kind": kind.value, "seconds": int(duration)})
+    )
+
+
+@router.message(Command("profile_stop"))
+async def cmd_profile_stop(message: Message, l10n: FluentLocalization, profiler: Profiler) -> None:
+    """Handle /profile_stop command - finish running profile capture early."""
+    if profiler.stop():
+        await message.answer(l10n.format_value("profile-stopping"))
+    else:
+        await message.answer(l10n.format_value("profile-not-running"))
+
+
+def format_broadcast_progress(l10n: FluentLocalization, state: BroadcastState, rate: float) -> str:
+    """Format broadcast progress message."""
+    return l10n.format_value("broadcast-progress", {
+        "status": state.status.value,
+        "processed": state.processed,
+        "total": state.total,
+        "sent": state.sent,
+        "failed": state.failed,
+        "blocked": state.blocked,
+        "rate": f"{rate:.1f}",
+    })
+
+
+@router.message(Command("broadcast"))
+async def cmd_broadcast(
+    message: Message,
+    command: CommandObject,
+    l10n: FluentLocalization,
+    broadcaster: Broadcaster,
+) -> None:
+    """
+    Handle /broadcast command - send a message to all users.
+
+    Sends command arguments as text, or copies the replied message.
+    """
+    if broadcaster.running:
+        await message.answer(l10n.format_value("broadcast-already-running"))
+        return
+
+    reply = message.reply_to_message
+    if reply is None and not command.args:
+        await message.answer(l10n.format_value("broadcast-usage"))
+        return
+
+    status_message = await message.answer(l10n.format_value("broadcast-started"))
+
+    async def report_progress(state: BroadcastState, rate: float) -> None:
+        await status_message.edit_text(format_broadcast_progress(l10n, state, rate))
+
+    if reply is not None:
+        await broadcaster.start(
+            message.chat.id,
+            from_chat_id=reply.chat.id,
+            message_id=reply.message_id,
+            on_progress=report_progress,
+        )
+    else:
+        await broadcaster.start(message.chat.id, text=command.args, on_progress=report_progress)
+
+
+@router.message(Command("broadcast_status"))
+async def cmd_broadcast_status(
+    message: Message,
+    l10n: FluentLocalization,
+    broadcaster: Broadcaster,
+) -> None:
+    """Handle /broadcast_status command - show progress of the last broadcast."""
+    state = broadcaster.state
+    if state is None:
+        await message.answer(l10n.format_value("broadcast-none"))
+        return
+
+    await message.answer(format_broadcast_progress(l10n, state, broadcaster.rate))
+
+
+@router.message(Command("broadcast_cancel"))
+async def cmd_broadcast_cancel(
+    message: Message,
+    l10n: FluentLocalization,
+    broadcaster: Broadcaster,
+) -> None:
+    """Handle /broadcast_cancel command - stop running broadcast."""
+    if broadcaster.cancel():
+        await message.answer(l10n.format_value("broadcast-cancelled"))
+    else:
+        await message.answer(l10n.format_value("broadcast-none"))
+
+
+async def render_users_page(
+    l10n: FluentLocalization,
+    repo: BaseRepository,
+    page: int,
+    cursor: Optional[int],
+) -> tuple[str, InlineKeyboardMarkup]:
+    """Build text and keyboard for a page of the users list."""
+    users, next_cursor = await repo.get_users_page(cursor, USERS_PAGE_SIZE)
+    total = await repo.count_users()
+
+    lines = [l10n.format_value("users-title", {"total": total})]
+    lines.extend(format_user_line(user) for user in users)
+
+    keyboard = get_cursor_pagination_kb(
+        current_page=page,
+        total_pages=max(1, ceil(total / USERS_PAGE_SIZE)),
+        cursor=cursor,
+        next_cursor=next_cursor,
+        action="users",
+    )
+    return "\n".join(lines), keyboard
+
+
+def format_user_line(user: dict[str, Any]) -> str:
+    """Format a single user for the users list."""
+    name = escape(user.get("first_name") or "")
+    if user.get("username"):
+        name += f" (@{escape(user['username'])})"
+    return f"<code>{user['user_id']}</code> {name}"
+
+
+@router.message(Command("users"))
+async def cmd_users(message: Message, l10n: FluentLocalization, repo: BaseRepository) -> None:
+    """Handle /users command - list bot users page by page."""
+    text, keyboard = await render_users_page(l10n, repo, page=1, cursor=None)
+    await message.answer(text, reply_markup=keyboard)
+
+
+@router.callback_query(PaginationCallback.filter(F.action == "users"))
+async def on_users_page(
+    callback: CallbackQuery,
+    callback_data: PaginationCallback,
+    l10n: FluentLocalization,
+    repo: BaseRepository,
+) -> None:
+    """Show another page of the users list, or refresh the current one."""
+    text, keyboard = await render_users_page(l10n, repo, callback_data.page, callback_data.cursor)
+    if callback.message is not None:
+        try:
+            await callback.message.edit_text(text, reply_markup=keyboard)
+        except TelegramBadRequest as e:
+            # Current page button pressed and nothing changed since
+            if "message is not modified" not in e.message:
+                raise
+    await callback.answer()
@@ -1,8 +1,12 @@
+from typing import Optional
+
 import structlog
 from aiogram import Router, F
-from aiogram.types import Message
+from aiogram.types import ChatMemberUpdated, Message
 from aiogram.exceptions import TelegramBadRequest
 
+from utils import ChatAdminIndex, ChatMemberCache
+
 
 router = Router(name="groups")
 router.message.filter(F.chat.type.in_({"group", "supergroup"}))
@@ -46,3 +50,17 @@ async def on_message_pinned(message: Message) -> None:
         chat_id=message.chat.id,
         pinned_message_id=message.pinned_message.message_id if message.pinned_message else None,
     )
+
+
+@router.chat_member()
+@router.my_chat_member()
+async def on_chat_member_updated(
+    event: ChatMemberUpdated,
+    admin_index: Optional[ChatAdminIndex] = None,
+    member_cache: Optional[ChatMemberCache] = None,
+) -> None:
+    """Keep cached member status in sync when it changes."""
+    if admin_index is not None:
+        admin_index.handle_update(event)
+    if member_cache is not None:
+        member_cache.handle_update(event)
@@ -4,6 +4,7 @@ from aiogram.filters import Command
 from aiogram.types import Message
 from fluent.runtime import FluentLocalization
 
+from db import BaseRepository
 from filters import IsOwnerFilter
 
 
@@ -14,13 +15,20 @@ logger = structlog.get_logger()
 
 
 @router.message(Command("start"))
-async def cmd_start(message: Message, l10n: FluentLocalization) -> None:
+async def cmd_start(message: Message, l10n: FluentLocalization, repo: BaseRepository) -> None:
     """Handle /start command for regular users."""
     await logger.ainfo(
         "User started bot",
         user_id=message.from_user.id if message.from_user else None,
         username=message.from_user.username if message.from_user else None,
     )
+    if message.from_user:
+        await repo.save_user(message.from_user.id, {
+            "username": message.from_user.username,
+            "first_name": message.from_user.first_name,
+            "last_name": message.from_user.last_name,
+            "language_code": message.from_user.language_code,
+        })
     await message.answer(l10n.format_value("hello-msg"))
 
 
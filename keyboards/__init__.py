@@ -1,9 +1,10 @@
 from .confirm import get_confirm_kb, ConfirmCallback
-from .pagination import get_pagination_kb, PaginationCallback
+from .pagination import get_cursor_pagination_kb, get_pagination_kb, PaginationCallback
 
 __all__ = [
     "get_confirm_kb",
     "ConfirmCallback",
+    "get_cursor_pagination_kb",
     "get_pagination_kb",
     "PaginationCallback",
 ]
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from aiogram.filters.callback_data import CallbackData
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
@@ -7,6 +9,7 @@ class PaginationCallback(CallbackData, prefix="page"):
     """Callback data for pagination buttons."""
     action: str
     page: int
+    cursor: Optional[int] = None  # used by cursor pagination only
 
 
 def get_pagination_kb(
@@ -54,3 +57,55 @@ def get_pagination_kb(
 
     builder.adjust(5)
     return builder.as_markup()
+
+
+def get_cursor_pagination_kb(
+    current_page: int,
+    total_pages: int,
+    cursor: Optional[int],
+    next_cursor: Optional[int],
+    action: str = "list",
+) -> InlineKeyboardMarkup:
+    """
+    Create a pagination keyboard for keyset (cursor) pagination.
+
+    Pages are fetched by cursor instead of offset, so only moving
+    to the first and to the next page is possible. The current page
+    button reloads the page, handlers should expect "message is not
+    modified" errors when nothing changed.
+
+    Args:
+        current_page: Current page number (1-indexed)
+        total_pages: Total number of pages
+        cursor: Cursor of the current page, None on the first page
+        next_cursor: Cursor of the next page, None on the last page
+        action: Action identifier for callback data
+
+    Returns:
+        InlineKeyboardMarkup with navigation buttons
+    """
+    builder = InlineKeyboardBuilder()
+
+    if current_page > 1:
+        builder.button(
+            text="« First",
+            callback_data=PaginationCallback(action=action, page=1),
+        )
+
+    builder.button(
+        text=f"{current_page}/{total_pages}",
+        callback_data=PaginationCallback(action=action, page=current_page, cursor=cursor),
+    )
+
+    if next_cursor is not None:
+        builder.button(
+            text="Next ›",
+            callback_data=PaginationCallback(
+                action=action,
+                page=current_page + 1,
+                cursor=next_cursor,
+            ),
+        )
+
+    builder.adjust(3)
+    return builder.as_markup()
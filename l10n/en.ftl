@@ -41,3 +41,42 @@ error-permission =
 confirm-yes = ✅ Confirm
 confirm-no = ❌ Cancel
 confirm-prompt = Are you sure you want to proceed?
+
+## Broadcast
+broadcast-usage =
+    <b>📣 Broadcast</b>
+    Send <code>/broadcast text</code> or reply to a message with /broadcast.
+
+broadcast-started = <b>📣 Broadcast started…</b>
+
+broadcast-already-running = <b>⏳ Another broadcast is already running.</b> Use /broadcast_status to check it.
+
+broadcast-none = No broadcast is running.
+
+broadcast-cancelled = <b>🛑 Broadcast cancelled.</b>
+
+broadcast-progress =
+    <b>📣 Broadcast: { $status }</b>
+    <b>Progress</b>: { $processed } / { $total }
+    <b>Sent</b>: { $sent }
+    <b>Failed</b>: { $failed }
+    <b>Blocked</b>: { $blocked }
+    <b>Speed</b>: { $rate } msg/s
+
+## Users list
+users-title = <b>👥 Users</b>: { $total }
+
+## Profiling
+profile-usage =
+    <b>🔬 Profiling</b>
+    Send <code>/profile cpu 30</code> or <code>/profile memory 30</code> to capture for up to { $max } seconds, /profile_stop to finish early.
+
+profile-started = <b>🔬 { $kind } profiling started</b> for { $seconds } s.
+
+profile-already-running = <b>⏳ { $kind } profiling is already running.</b> Use /profile_stop to finish it.
+
+profile-not-running = No profiling is running.
+
+profile-stopping = <b>🔬 Finishing profiling…</b>
+
+profile-report = 🔬 { $kind } profile
@@ -41,3 +41,42 @@ error-permission =
 confirm-yes = ✅ Подтвердить
 confirm-no = ❌ Отмена
 confirm-prompt = Вы уверены, что хотите продолжить?
+
+## Рассылка
+broadcast-usage =
+    <b>📣 Рассылка</b>
+    Отправьте <code>/broadcast текст</code> или ответьте на сообщение командой /broadcast.
+
+broadcast-started = <b>📣 Рассылка запущена…</b>
+
+broadcast-already-running = <b>⏳ Другая рассылка уже идёт.</b> Проверить её можно командой /broadcast_status.
+
+broadcast-none = Рассылка не запущена.
+
+broadcast-cancelled = <b>🛑 Рассылка отменена.</b>
+
+broadcast-progress =
+    <b>📣 Рассылка: { $status }</b>
+    <b>Прогресс</b>: { $processed } / { $total }
+    <b>Отправлено</b>: { $sent }
+    <b>Ошибки</b>: { $failed }
+    <b>Заблокировали</b>: { $blocked }
+    <b>Скорость</b>: { $rate } сообщ./с
+
+## Список пользователей
+users-title = <b>👥 Пользователи</b>: { $total }
+
+## Профилирование
+profile-usage =
+    <b>🔬 Профилирование</b>
+    Отправьте <code>/profile cpu 30</code> или <code>/profile memory 30</code>, чтобы снять профиль длиной до { $max } секунд, /profile_stop — чтобы закончить раньше.
+
+profile-started = <b>🔬 Профилирование { $kind } запущено</b> на { $seconds } с.
+
+profile-already-running = <b>⏳ Профилирование { $kind } уже идёт.</b> Закончить его можно командой /profile_stop.
+
+profile-not-running = Профилирование не запущено.
+
+profile-stopping = <b>🔬 Завершаю профилирование…</b>
+
+profile-report = 🔬 Профиль { $kind }
@@ -1,11 +1,368 @@
+import atexit
+import json
 import logging
-from json import dumps
-from typing import Any
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Mapping, Optional, TextIO
 
 import structlog
-from structlog import WriteLoggerFactory
+from structlog import BytesLoggerFactory, WriteLoggerFactory
+from structlog.typing import EventDict, Processor, WrappedLogger
 
-from config_reader import LogConfig, LogRenderer
+from config_reader import LogConfig, LogRenderer, LogSamplingRule, OverflowPolicy
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class QueueLoggerFactory:
+    """
+    structlog logger factory that renders and writes log records on a thread.
+
+    Loggers only put event dicts into a bounded queue, so logging never waits
+    for a slow output. A writer thread takes records in batches, renders them
+    with `renderer` and writes each batch with one write and flush, to the
+    binary buffer of `file` if the renderer returns bytes. When the
+    queue is full, new records are dropped and counted, or with
+    OverflowPolicy.DELAY the logging thread waits for free space.
+
+    Records are rendered after the call returns, so values logged must not
+    be changed afterwards.
+
+    Usage:
+        factory = QueueLoggerFactory(structlog.processors.JSONRenderer())
+        structlog.configure(processors=[...], logger_factory=factory)
+        # ...
+        factory.close()  # writes queued records
+    """
+
+    BATCH_SIZE = 256
+
+    def __init__(
+        self,
+        renderer: Processor,
+        file: Optional[TextIO] = None,
+        max_queue_size: int = 10000,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP,
+        binary: bool = False,
+    ) -> None:
+        """
+        Args:
+            renderer: Processor turning an event dict into a string or bytes
+            file: Output stream, stdout by default
+            max_queue_size: Maximum number of records waiting to be written
+            overflow_policy: What to do with records when the queue is full
+            binary: Whether the renderer returns bytes
+        """
+        self.renderer = renderer
+        self.file = file if file is not None else sys.stdout
+        self.binary = binary
+        # Bytes go to the underlying buffer of text streams like stdout
+        self._output: Any = getattr(self.file, "buffer", self.file) if binary else self.file
+        self.overflow_policy = overflow_policy
+        self._queue: queue.Queue[Optional[EventDict]] = queue.Queue(max_queue_size)
+        self._closed = False
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+    def __call__(self, *args: Any) -> "QueueLogger":
+        return QueueLogger(self)
+
+    def put(self, event_dict: EventDict) -> None:
+        """Queue a record, or write it right away once the factory is closed."""
+        if self._closed:
+            self._write([event_dict])
+        elif self.overflow_policy == OverflowPolicy.DELAY:
+            self._queue.put(event_dict)
+        else:
+            try:
+                self._queue.put_nowait(event_dict)
+            except queue.Full:
+                self.dropped += 1
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """
+        Write queued records and stop the writer thread.
+
+        Blocks, so call it from a worker thread in async code.
+
+        Args:
+            timeout: Seconds to wait for queued records to be written
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self) -> dict[str, int]:
+        """Get counters for monitoring."""
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+        }
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is None
+            if stop:
+                batch.pop()
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch: list[EventDict]) -> None:
+        lines = []
+        for event_dict in batch:
+            try:
+                lines.append(self.renderer(None, "msg", event_dict))
+            except Exception as e:  # a broken record must not stop the writer
+                error = f"Failed to render log record {event_dict!r}: {e!r}"
+                lines.append(error.encode() if self.binary else error)
+
+        separator = b"\n" if self.binary else "\n"
+        with self._write_lock:
+            try:
+                self._output.write(separator.join(lines) + separator)
+                self._output.flush()
+            except Exception:
+                # Output is gone (closed pipe or stream) or got a line of the wrong
+                # type, nothing to report to, but the writer thread must keep running
+                self.dropped += len(lines)
+                return
+            self.written += len(lines)
+            self.batches += 1
+
+
+class QueueLogger:
+    """Logger returned by QueueLoggerFactory, takes event dicts instead of strings."""
+
+    def __init__(self, factory: QueueLoggerFactory) -> None:
+        self._factory = factory
+
+    def msg(self, **event_dict: Any) -> None:
+        self._factory.put(event_dict)
+
+    log = debug = info = warn = warning = msg
+    fatal = failure = err = error = critical = exception = msg
+
+
+def capture_exc_info(logger: WrappedLogger, method_name: str, event_dict: EventDict) -> EventDict:
+    """Replace `exc_info=True` with the exception, which is gone when rendering on a thread."""
+    if event_dict.get("exc_info") is True:
+        event_dict["exc_info"] = sys.exc_info()
+    return event_dict
+
+
+class JSONBytesRenderer:
+    """
+    Render event dicts as JSON bytes with some keys first.
+
+    Uses orjson if it is installed and the json module otherwise, and returns
+    bytes for BytesLoggerFactory or a binary QueueLoggerFactory. Values JSON
+    can't represent are written as their str().
+
+    Usage:
+        structlog.configure(
+            processors=[..., JSONBytesRenderer()],
+            logger_factory=structlog.BytesLoggerFactory(),
+        )
+    """
+
+    # json.dumps() with options builds a new encoder on every call
+    _json_encoder = json.JSONEncoder(default=str, ensure_ascii=False, separators=(",", ":"))
+
+    def __init__(self, first_keys: tuple[str, ...] = ("timestamp", "level", "event")) -> None:
+        """
+        Args:
+            first_keys: Keys to put first, in this order, when present
+        """
+        self.first_keys = first_keys
+
+    @classmethod
+    def dumps(cls, value: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+        return cls._json_encoder.encode(value).encode()
+
+    def __call__(self, logger: WrappedLogger, method_name: str, event_dict: EventDict) -> bytes:
+        # One serializer call on a reordered shallow copy is faster than
+        # serializing leading keys separately and splicing the output
+        ordered = {key: event_dict.pop(key) for key in self.first_keys if key in event_dict}
+        ordered.update(event_dict)
+        return self.dumps(ordered)
+
+
+class CachedTimeStamper:
+    """
+    Add a formatted timestamp, formatting the whole seconds once per second.
+
+    Drop-in replacement for structlog's TimeStamper with an strftime format:
+    the parts of `fmt` around "%f" are formatted when the second changes and
+    only microseconds are inserted for each log line. "iso" gives ISO 8601
+    with microseconds.
+
+    Usage:
+        structlog.configure(processors=[CachedTimeStamper("%H:%M:%S.%f"), ...])
+    """
+
+    def __init__(self, fmt: str = "iso", utc: bool = True, key: str = "timestamp") -> None:
+        """
+        Args:
+            fmt: strftime format or "iso"
+            utc: Whether to use UTC instead of local time
+            key: Event dict key to add the timestamp under
+        """
+        if fmt == "iso":
+            fmt = "%Y-%m-%dT%H:%M:%S.%f" + ("Z" if utc else "")
+        self.fmt = fmt
+        self.key = key
+        self.tz = timezone.utc if utc else None
+        # Formatted parts around "%f" for one second, replaced as a whole so
+        # loggers on other threads never see a half-updated cache
+        self._cache: tuple[int, list[str]] = (-1, [])
+
+    def __call__(self, logger: WrappedLogger, method_name: str, event_dict: EventDict) -> EventDict:
+        now = time.time()
+        second = int(now)
+        cached_second, parts = self._cache
+        if second != cached_second:
+            dt = datetime.fromtimestamp(second, self.tz)
+            if self.tz is None:
+                dt = dt.astimezone()  # attach local timezone for %z and %Z
+            parts = [dt.strftime(part) for part in self.fmt.split("%f")]
+            self._cache = (second, parts)
+
+        if len(parts) == 1:
+            event_dict[self.key] = parts[0]
+        else:
+            event_dict[self.key] = f"{int((now - second) * 1_000_000):06d}".join(parts)
+        return event_dict
+
+
+def add_monotonic_time(
+    logger: WrappedLogger,
+    method_name: str,
+    event_dict: EventDict,
+) -> EventDict:
+    """Add monotonic clock seconds, for measuring latency between log lines."""
+    event_dict["monotonic"] = time.monotonic()
+    return event_dict
+
+
+class LogSampler:
+    """
+    Processor that samples and rate-limits log records by event message.
+
+    A record is kept with probability `sample_rate` of its rule, and only
+    `max_per_window` records of the same event are kept per window. Other
+    records are dropped before any further processing. With the first record
+    after each window, a "Similar log events suppressed" record is logged
+    for every event that had records dropped. Errors and records with
+    exceptions are always kept.
+
+    Usage:
+        sampler = LogSampler({"User started bot": LogSamplingRule(sample_rate=0.1)})
+        structlog.configure(processors=[sampler, ...])
+        # ...
+        sampler.flush()  # log remaining summaries
+    """
+
+    SUMMARY_EVENT = "Similar log events suppressed"
+    ALWAYS_KEPT = frozenset({"error", "critical", "exception"})
+    MAX_EVENTS = 10000  # events tracked at once, later ones aren't rate-limited
+
+    def __init__(
+        self,
+        rules: Mapping[str, LogSamplingRule],
+        default_rule: Optional[LogSamplingRule] = None,
+        window: float = 60.0,
+    ) -> None:
+        """
+        Args:
+            rules: Rules by event message
+            default_rule: Rule for events without their own, keeps all by default
+            window: Seconds per rate limit window and between summaries
+        """
+        self.rules = dict(rules)
+        self.default_rule = default_rule if default_rule is not None else LogSamplingRule()
+        self.window = window
+        self._lock = threading.Lock()
+        # Event to [window start, records kept in window]
+        self._windows: dict[str, list[float]] = {}
+        self._suppressed: dict[str, int] = {}
+        self._next_summary = time.monotonic() + window
+
+    def __call__(self, logger: WrappedLogger, method_name: str, event_dict: EventDict) -> EventDict:
+        event = event_dict.get("event")
+        if (
+            not isinstance(event, str)
+            or event == self.SUMMARY_EVENT
+            or method_name in self.ALWAYS_KEPT
+            or event_dict.get("exc_info")
+        ):
+            return event_dict
+
+        now = time.monotonic()
+        if now >= self._next_summary:
+            self.flush()
+
+        rule = self.rules.get(event, self.default_rule)
+        keep = rule.sample_rate >= 1.0 or random.random() < rule.sample_rate
+
+        with self._lock:
+            if keep and rule.max_per_window:
+                window = self._windows.get(event)
+                if window is None or now - window[0] >= self.window:
+                    if window is not None or len(self._windows) < self.MAX_EVENTS:
+                        self._windows[event] = [now, 1]
+                elif window[1] < rule.max_per_window:
+                    window[1] += 1
+                else:
+                    keep = False
+            if not keep:
+                self._suppressed[event] = self._suppressed.get(event, 0) + 1
+
+        if not keep:
+            raise structlog.DropEvent
+        return event_dict
+
+    def flush(self) -> None:
+        """Log summaries of suppressed records and start counting anew."""
+        with self._lock:
+            suppressed, self._suppressed = self._suppressed, {}
+            self._next_summary = time.monotonic() + self.window
+            # Drop windows that ended, events seen again start a new one
+            now = time.monotonic()
+            self._windows = {
+                event: window
+                for event, window in self._windows.items()
+                if now - window[0] < self.window
+            }
+
+        logger = structlog.get_logger()
+        for event, count in suppressed.items():
+            logger.info(self.SUMMARY_EVENT, suppressed_event=event, suppressed=count)
 
 
 def get_structlog_config(log_config: LogConfig) -> dict[str, Any]:
@@ -19,12 +376,30 @@ def get_structlog_config(log_config: LogConfig) -> dict[str, Any]:
         Configuration dict for structlog.configure()
     """
     min_level = logging.DEBUG if log_config.show_debug_logs else logging.INFO
+    processors = get_processors(log_config)
+
+    if log_config.async_sink:
+        # The renderer runs on the writer thread, loggers pass event dicts to it
+        renderer = processors.pop()
+        processors.append(capture_exc_info)
+        logger_factory = QueueLoggerFactory(
+            renderer,
+            max_queue_size=log_config.queue_size,
+            overflow_policy=log_config.overflow_policy,
+            binary=log_config.renderer == LogRenderer.JSON,
+        )
+        # Queued records are lost with the daemon writer thread if main() exits early
+        atexit.register(logger_factory.close)
+    elif log_config.renderer == LogRenderer.JSON:
+        logger_factory = BytesLoggerFactory()
+    else:
+        logger_factory = WriteLoggerFactory()
 
     return {
-        "processors": get_processors(log_config),
+        "processors": processors,
         "cache_logger_on_first_use": True,
         "wrapper_class": structlog.make_filtering_bound_logger(min_level),
-        "logger_factory": WriteLoggerFactory(),
+        "logger_factory": logger_factory,
     }
 
 
@@ -38,37 +413,26 @@ def get_processors(log_config: LogConfig) -> list:
     Returns:
         List of processor functions
     """
+    processors: list[Processor] = []
 
-    def custom_json_serializer(data: dict, *args, **kwargs) -> str:
-        """Custom JSON serializer with ordered keys."""
-        result = {}
-
-        if log_config.show_datetime and "timestamp" in data:
-            result["timestamp"] = data.pop("timestamp")
-
-        for key in ("level", "event"):
-            if key in data:
-                result[key] = data.pop(key)
-
-        result.update(**data)
-        return dumps(result, default=str)
-
-    processors = []
+    sampling = log_config.sampling
+    if sampling.enabled:
+        # First, so dropped records cost no further processing
+        processors.append(LogSampler(sampling.events, sampling, sampling.window))
 
     if log_config.show_datetime:
         processors.append(
-            structlog.processors.TimeStamper(
-                fmt=log_config.datetime_format,
-                utc=log_config.time_in_utc,
-            )
+            CachedTimeStamper(fmt=log_config.datetime_format, utc=log_config.time_in_utc)
         )
+    if log_config.show_monotonic_time:
+        processors.append(add_monotonic_time)
 
     processors.append(structlog.processors.add_log_level)
 
     if log_config.renderer == LogRenderer.JSON:
-        processors.append(
-            structlog.processors.JSONRenderer(serializer=custom_json_serializer)
-        )
+        # JSON can't hold exc_info, render tracebacks to the "exception" key
+        processors.append(structlog.processors.format_exc_info)
+        processors.append(JSONBytesRenderer())
     else:
         processors.append(
             structlog.dev.ConsoleRenderer(
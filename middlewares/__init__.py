@@ -1,10 +1,26 @@
+from .flood_control import FloodControlMiddleware, SendPriority, send_priority
 from .localization import L10nMiddleware
+from .metrics import BotMetrics
+from .scheduler import UpdateScheduler
 from .throttling import ThrottlingMiddleware
+from .throttling_storage import (
+    BaseThrottlingStorage,
+    MemoryThrottlingStorage,
+    RedisThrottlingStorage,
+)
 from .weekend import WeekendMessageMiddleware, WeekendCallbackMiddleware
 
 __all__ = [
+    "BaseThrottlingStorage",
+    "BotMetrics",
+    "FloodControlMiddleware",
     "L10nMiddleware",
+    "MemoryThrottlingStorage",
+    "RedisThrottlingStorage",
+    "SendPriority",
     "ThrottlingMiddleware",
+    "UpdateScheduler",
     "WeekendMessageMiddleware",
     "WeekendCallbackMiddleware",
+    "send_priority",
 ]
@@ -0,0 +1,205 @@
+import asyncio
+import heapq
+from contextvars import ContextVar
+from enum import IntEnum
+from itertools import count
+from time import monotonic
+from typing import Any, Optional, Union
+
+import structlog
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+
+logger = structlog.get_logger()
+
+
+class SendPriority(IntEnum):
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+# Priority of messages sent from the current context,
+# e.g. `send_priority.set(SendPriority.LOW)` in a broadcast task
+send_priority: ContextVar[SendPriority] = ContextVar("send_priority", default=SendPriority.NORMAL)
+
+LIMITED_METHOD_PREFIXES = ("send", "copyMessage", "forwardMessage", "editMessage")
+
+
+class _PriorityRateLimiter:
+    """Evenly spaced rate limiter that lets higher priority waiters go first."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate
+        self._next_at = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = count()
+        self._pump: Optional[asyncio.Task] = None
+
+    async def acquire(self, priority: int) -> None:
+        now = monotonic()
+        if not self._waiters and now >= self._next_at:
+            self._next_at = now + self.interval
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._pump is None:
+            self._pump = asyncio.create_task(self._release_waiters())
+        await future
+
+    async def _release_waiters(self) -> None:
+        try:
+            while self._waiters:
+                delay = self._next_at - monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                _, _, future = heapq.heappop(self._waiters)
+                if future.done():  # Waiter was cancelled
+                    continue
+
+                self._next_at = max(self._next_at, monotonic()) + self.interval
+                future.set_result(None)
+        finally:
+            self._pump = None
+
+
+class FloodControlMiddleware(BaseRequestMiddleware):
+    """
+    Bot session middleware that keeps outgoing messages within Telegram limits.
+
+    Messages are spaced per chat (about 1 per second in private chats and
+    20 per minute in groups) and globally (about 30 per second), with higher
+    priority messages released first. Requests that still hit flood control
+    are retried after the `retry_after` Telegram asks for.
+
+    Only message sending/editing methods are limited, other requests
+    are just retried on flood control errors.
+
+    Usage:
+        bot.session.middleware(FloodControlMiddleware(global_rate=30))
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        private_chat_interval: float = 1.0,
+        group_chat_interval: float = 3.0,
+        max_retries: int = 3,
+        max_chats: int = 10000,
+    ) -> None:
+        """
+        Args:
+            global_rate: Maximum messages per second across all chats
+            private_chat_interval: Minimum seconds between messages to a private chat
+            group_chat_interval: Minimum seconds between messages to a group or channel
+            max_retries: How many times to retry a request after flood control error
+            max_chats: Number of tracked chats that triggers cleanup of idle ones
+        """
+        self.private_chat_interval = private_chat_interval
+        self.group_chat_interval = group_chat_interval
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self._global = _PriorityRateLimiter(global_rate)
+        self._chat_next_at: dict[Union[int, str], float] = {}
+
+        self.requests = 0
+        self.delayed = 0
+        self.retry_after_hits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        limited = (
+            chat_id is not None
+            and method.__api_method__.startswith(LIMITED_METHOD_PREFIXES)
+        )
+
+        attempt = 0
+        while True:
+            if limited:
+                await self._wait_turn(chat_id)
+
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.retry_after_hits += 1
+                if attempt >= self.max_retries:
+                    raise
+
+                attempt += 1
+                if limited:
+                    # Hold back everything else queued for this chat as well
+                    self._chat_next_at[chat_id] = max(
+                        self._chat_next_at.get(chat_id, 0.0),
+                        monotonic() + e.retry_after,
+                    )
+                else:
+                    await asyncio.sleep(e.retry_after)
+
+                await logger.awarning(
+                    "Flood control exceeded, retrying",
+                    method=method.__api_method__,
+                    chat_id=chat_id,
+                    retry_after=e.retry_after,
+                    attempt=attempt,
+                )
+
+    async def _wait_turn(self, chat_id: Union[int, str]) -> None:
+        started_at = monotonic()
+
+        # Reserve the next free slot of the chat without holding any lock
+        interval = (
+            self.private_chat_interval
+            if isinstance(chat_id, int) and chat_id > 0
+            else self.group_chat_interval
+        )
+        slot = max(started_at, self._chat_next_at.get(chat_id, 0.0))
+        if chat_id not in self._chat_next_at and len(self._chat_next_at) >= self.max_chats:
+            self._prune_chats(started_at)
+        self._chat_next_at[chat_id] = slot + interval
+
+        if slot > started_at:
+            await asyncio.sleep(slot - started_at)
+        await self._global.acquire(send_priority.get())
+
+        waited = monotonic() - started_at
+        self.requests += 1
+        if waited > 0.001:
+            self.delayed += 1
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+
+    def _prune_chats(self, now: float) -> None:
+        for chat_id in [k for k, next_at in self._chat_next_at.items() if next_at <= now]:
+            del self._chat_next_at[chat_id]
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get flood control counters.
+
+        Returns:
+            Dict with limited requests count, how many of them were delayed,
+            flood control errors received and wait times
+        """
+        return {
+            "requests": self.requests,
+            "delayed": self.delayed,
+            "retry_after_hits": self.retry_after_hits,
+            "wait_time_avg": self.wait_time_total / self.requests if self.requests else 0.0,
+            "wait_time_max": self.wait_time_max,
+        }
@@ -1,31 +1,97 @@
-from typing import Any, Awaitable, Callable, Dict, Union
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Union
 
 from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery, PreCheckoutQuery
 from fluent.runtime import FluentLocalization
 
+from db import BaseRepository
+
 
 EventType = Union[Message, CallbackQuery, PreCheckoutQuery]
 
 
 class L10nMiddleware(BaseMiddleware):
     """
-    Middleware that injects localization into handler data.
+    Middleware that injects localization of the user's language into handler data.
+
+    The locale is taken from the `locale` field of the stored user, if a
+    repository is given and the user has one, then from the Telegram
+    `language_code` (exact match like "pt-br" first, then "pt"), and falls
+    back to the default locale. Localizations are preloaded, so picking
+    one is a dict lookup.
 
-    The FluentLocalization object will be available as 'l10n' in handlers.
+    The FluentLocalization object will be available as 'l10n' in handlers,
+    and its locale code as 'locale'.
 
     Usage:
+        l10n_middleware = L10nMiddleware(get_fluent_localizations("l10n"), "en", repo)
+        dp.message.outer_middleware(l10n_middleware)
+
         @router.message()
         async def handler(message: Message, l10n: FluentLocalization):
             await message.answer(l10n.format_value("hello-msg"))
     """
 
-    def __init__(self, locale: FluentLocalization) -> None:
+    def __init__(
+        self,
+        locales: Mapping[str, FluentLocalization],
+        default_locale: str = "en",
+        repo: Optional[BaseRepository] = None,
+    ) -> None:
         """
         Args:
-            locale: FluentLocalization instance to inject
+            locales: Dict of locale code to FluentLocalization instance
+            default_locale: Locale for users whose language is not available
+            repo: Repository to read stored locale preferences from
+        """
+        self.default_locale = default_locale
+        self.repo = repo
+        self.set_locales(locales)
+
+    def set_locales(self, locales: Mapping[str, FluentLocalization]) -> None:
         """
-        self.locale = locale
+        Replace localizations, e.g. after translation files were changed.
+
+        Events being handled keep the localization they got.
+
+        Args:
+            locales: Dict of locale code to FluentLocalization instance
+        """
+        if self.default_locale not in locales:
+            raise ValueError(f"Default locale '{self.default_locale}' is not loaded")
+
+        # Telegram language code to available locale code
+        self._resolved: dict[str, str] = {}
+        self.locales = dict(locales)
+
+    def resolve_locale(self, language_code: Optional[str]) -> str:
+        """
+        Get available locale code for a language code.
+
+        Args:
+            language_code: IETF language tag, e.g. "en" or "pt-BR"
+
+        Returns:
+            Locale code to use
+        """
+        if not language_code:
+            return self.default_locale
+
+        locale = self._resolved.get(language_code)
+        if locale is None:
+            tag = language_code.lower().replace("_", "-")
+            primary = tag.split("-", 1)[0]
+            if tag in self.locales:
+                locale = tag
+            elif primary in self.locales:
+                locale = primary
+            else:
+                locale = self.default_locale
+
+            # Telegram sends a handful of distinct codes, but don't trust it to
+            if len(self._resolved) < 1000:
+                self._resolved[language_code] = locale
+        return locale
 
     async def __call__(
         self,
@@ -33,5 +99,15 @@ class L10nMiddleware(BaseMiddleware):
         event: EventType,
         data: Dict[str, Any],
     ) -> Any:
-        data["l10n"] = self.locale
+        user = event.from_user
+        language_code = user.language_code if user is not None else None
+
+        if self.repo is not None and user is not None:
+            stored = await self.repo.get_user(user.id)
+            if stored is not None and stored.get("locale"):
+                language_code = stored["locale"]
+
+        locale = self.resolve_locale(language_code)
+        data["l10n"] = self.locales[locale]
+        data["locale"] = locale
         return await handler(event, data)
@@ -0,0 +1,194 @@
+"""
+Prometheus metrics of update handling.
+
+Requires: pip install prometheus-client
+"""
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, Mapping
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Histogram,
+        generate_latest,
+    )
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    CollectorRegistry = None
+
+
+Handler = Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]]
+StatsSource = Callable[[], Mapping[str, Any]]
+
+# Observers that don't receive events of their own type
+SKIPPED_OBSERVERS = frozenset({"update", "error"})
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class BotMetrics:
+    """
+    Prometheus metrics of update handling and bot components.
+
+    setup() registers an outer middleware on every dispatcher observer,
+    counting events and errors by event type, and an inner one timing
+    handlers by router and handler name. Label children are created in
+    setup(), so handling an event takes a dict lookup and a couple of
+    counter increments. Components' stats() are read when metrics are
+    collected and exported as gauges.
+
+    Since the outer middlewares are on observers and not on updates, they
+    run after UpdateScheduler hands the update to a worker and see errors
+    of handlers.
+
+    Usage:
+        metrics = BotMetrics()
+        register_all_handlers(dp)
+        metrics.setup(dp)  # after handlers are registered
+        metrics.add_stats("scheduler", scheduler.stats)
+        body = metrics.render()
+    """
+
+    def __init__(self, namespace: str = "bot") -> None:
+        """
+        Args:
+            namespace: Prefix of metric names
+        """
+        if CollectorRegistry is None:
+            raise ImportError(
+                "prometheus-client is required. Install with: pip install prometheus-client"
+            )
+
+        self.namespace = namespace
+        self.registry = CollectorRegistry()
+        self.events = Counter(
+            "events", "Events received by dispatcher observers",
+            ["event_type"], namespace=namespace, registry=self.registry,
+        )
+        self.errors = Counter(
+            "errors", "Events whose handling raised an exception",
+            ["event_type"], namespace=namespace, registry=self.registry,
+        )
+        self.handler_duration = Histogram(
+            "handler_duration_seconds", "Time spent in handlers",
+            ["router", "handler"], namespace=namespace, registry=self.registry,
+            buckets=LATENCY_BUCKETS,
+        )
+        self._stats: dict[str, StatsSource] = {}
+        self._handler_children: dict[int, Any] = {}
+        self.registry.register(_StatsCollector(namespace, self._stats))
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPE_LATEST
+
+    def setup(self, dp: Dispatcher) -> None:
+        """Register middlewares and create label children for all handlers."""
+        handler_middleware = HandlerMetricsMiddleware(self)
+
+        for event_type, observer in dp.observers.items():
+            if event_type in SKIPPED_OBSERVERS:
+                continue
+            observer.outer_middleware(EventMetricsMiddleware(
+                self.events.labels(event_type),
+                self.errors.labels(event_type),
+            ))
+            observer.middleware(handler_middleware)
+
+        for router in dp.chain_tail:
+            for observer in router.observers.values():
+                for handler in observer.handlers:
+                    self.handler_histogram(router.name, handler)
+
+    def handler_histogram(self, router_name: str, handler: HandlerObject) -> Any:
+        """Get latency histogram child of a handler, created in setup() for known handlers."""
+        child = self._handler_children.get(id(handler))
+        if child is None:
+            name = getattr(handler.callback, "__name__", type(handler.callback).__name__)
+            child = self._handler_children[id(handler)] = self.handler_duration.labels(
+                router_name, name,
+            )
+        return child
+
+    def add_stats(self, name: str, source: StatsSource) -> None:
+        """
+        Export numeric values of a component's stats() as gauges.
+
+        Args:
+            name: Component name, part of metric names
+            source: Callable returning a dict of counters
+        """
+        self._stats[name] = source
+
+    def render(self) -> bytes:
+        """Get all metrics in Prometheus text format."""
+        return generate_latest(self.registry)
+
+
+class EventMetricsMiddleware(BaseMiddleware):
+    """Outer observer middleware counting events and errors of one event type."""
+
+    def __init__(self, events: Any, errors: Any) -> None:
+        """
+        Args:
+            events: Counter child of the event type
+            errors: Error counter child of the event type
+        """
+        self._events = events
+        self._errors = errors
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        self._events.inc()
+        try:
+            return await handler(event, data)
+        except Exception:
+            self._errors.inc()
+            raise
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner observer middleware timing handlers."""
+
+    def __init__(self, metrics: BotMetrics) -> None:
+        """
+        Args:
+            metrics: Metrics holding handler histograms
+        """
+        self.metrics = metrics
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        histogram = self.metrics.handler_histogram(data["event_router"].name, data["handler"])
+        start = perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            histogram.observe(perf_counter() - start)
+
+
+class _StatsCollector:
+    """Collector exporting components' stats() as gauges on every scrape."""
+
+    def __init__(self, namespace: str, sources: Mapping[str, StatsSource]) -> None:
+        self.namespace = namespace
+        self.sources = sources
+
+    def collect(self) -> Any:
+        for name, source in list(self.sources.items()):
+            for key, value in source().items():
+                if isinstance(value, (int, float)):
+                    yield GaugeMetricFamily(
+                        f"{self.namespace}_{name}_{key}",
+                        f"{name} {key.replace('_', ' ')}",
+                        value=value,
+                    )
+
+    def describe(self) -> list:
+        # Names depend on stats() keys, don't let the registry call collect() early
+        return []
+
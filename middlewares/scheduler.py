@@ -0,0 +1,198 @@
+import asyncio
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import structlog
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.dispatcher.middlewares.error import ErrorsMiddleware
+from aiogram.types import Chat, Update, User
+
+from config_reader import OverflowPolicy
+
+
+logger = structlog.get_logger()
+
+Handler = Callable[[Update, Dict[str, Any]], Awaitable[Any]]
+
+
+class _KeyQueue:
+    """Queue of updates for a single chat/user with its pending counter."""
+
+    __slots__ = ("queue", "pending")
+
+    def __init__(self, maxsize: int) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        # Queued + blocked on put + being processed
+        self.pending = 0
+
+
+class UpdateScheduler(BaseMiddleware):
+    """
+    Update middleware that schedules update processing.
+
+    Updates of the same chat (or user, when there is no chat) are processed
+    strictly one after another, updates of different chats run concurrently
+    up to `max_concurrency`. Per-key queues are created on demand and removed
+    as soon as they become idle.
+
+    The middleware returns right after queueing, so polling should run with
+    `handle_as_tasks=False`: then the `delay` overflow policy blocks fetching
+    of the next updates until the overflowing queue has room again.
+
+    Usage:
+        scheduler = UpdateScheduler(max_concurrency=64)
+        scheduler.setup(dp)
+        await dp.start_polling(bot, handle_as_tasks=False)
+        # ...
+        await scheduler.close()
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 64,
+        max_queue_size: int = 100,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DELAY,
+        shutdown_timeout: float = 10.0,
+    ) -> None:
+        """
+        Args:
+            max_concurrency: Maximum number of updates processed at once
+            max_queue_size: Maximum number of queued updates per chat/user
+            overflow_policy: What to do with an update when its queue is full
+            shutdown_timeout: Seconds close() waits for queues to drain
+        """
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.shutdown_timeout = shutdown_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._queues: dict[int, _KeyQueue] = {}
+        self._workers: set[asyncio.Task] = set()
+        self._errors: Optional[ErrorsMiddleware] = None
+
+        self.queued = 0
+        self.max_queued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def setup(self, dp: Dispatcher) -> None:
+        """Register scheduler as outer middleware of dispatcher updates."""
+        # Handlers run after the dispatcher's own error middleware has returned,
+        # so errors are routed to error handlers from the worker
+        self._errors = ErrorsMiddleware(dp)
+        dp.update.outer_middleware(self)
+
+    async def __call__(
+        self,
+        handler: Handler,
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        chat: Optional[Chat] = data.get("event_chat")
+        user: Optional[User] = data.get("event_from_user")
+        key = chat.id if chat else user.id if user else None
+
+        if key is None:
+            self._spawn(self._run_unordered(handler, event, data, monotonic()))
+            return None
+
+        key_queue = self._queues.get(key)
+        if key_queue is None:
+            key_queue = self._queues[key] = _KeyQueue(self.max_queue_size)
+            self._spawn(self._run_ordered(key, key_queue))
+        elif key_queue.queue.full() and self.overflow_policy == OverflowPolicy.DROP:
+            self.dropped += 1
+            await logger.awarning(
+                "Update dropped, chat queue is full",
+                key=key,
+                update_id=event.update_id,
+            )
+            return None
+
+        key_queue.pending += 1
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        await key_queue.queue.put((handler, event, data, monotonic()))
+        return None
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        task = asyncio.ensure_future(coro)
+        self._workers.add(task)
+        task.add_done_callback(self._workers.discard)
+
+    async def _run_ordered(self, key: int, key_queue: _KeyQueue) -> None:
+        try:
+            while True:
+                handler, event, data, queued_at = await key_queue.queue.get()
+                self.queued -= 1
+                await self._process(handler, event, data, queued_at)
+
+                key_queue.pending -= 1
+                if key_queue.pending == 0:
+                    break
+        finally:
+            del self._queues[key]
+
+    async def _run_unordered(
+        self,
+        handler: Handler,
+        event: Update,
+        data: Dict[str, Any],
+        queued_at: float,
+    ) -> None:
+        await self._process(handler, event, data, queued_at)
+
+    async def _process(
+        self,
+        handler: Handler,
+        event: Update,
+        data: Dict[str, Any],
+        queued_at: float,
+    ) -> None:
+        async with self._semaphore:
+            wait_time = monotonic() - queued_at
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+            try:
+                if self._errors is not None:
+                    await self._errors(handler, event, data)
+                else:
+                    await handler(event, data)
+            except Exception:
+                await logger.aexception(
+                    "Failed to process update",
+                    update_id=event.update_id,
+                )
+            finally:
+                self.processed += 1
+
+    async def close(self) -> None:
+        """Wait for queued updates to be processed, cancel the rest after timeout."""
+        if not self._workers:
+            return
+
+        _, pending = await asyncio.wait(set(self._workers), timeout=self.shutdown_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            await logger.awarning("Scheduler closed with unprocessed updates", left=self.queued)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get scheduler counters.
+
+        Returns:
+            Dict with queue depth, processed/dropped counts and wait times
+        """
+        return {
+            "queues": len(self._queues),
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "wait_time_avg": self.wait_time_total / self.processed if self.processed else 0.0,
+            "wait_time_max": self.wait_time_max,
+        }
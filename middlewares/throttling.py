@@ -1,8 +1,10 @@
 from typing import Any, Awaitable, Callable, Dict, Optional, Union
 
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from aiogram.types import Message, CallbackQuery
-from cachetools import TTLCache
+
+from .throttling_storage import BaseThrottlingStorage, MemoryThrottlingStorage
 
 
 EventType = Union[Message, CallbackQuery]
@@ -12,26 +14,70 @@ class ThrottlingMiddleware(BaseMiddleware):
     """
     Rate limiting middleware to prevent spam.
 
-    Limits how often a user can send messages to the bot.
+    Limits how often a user can trigger handlers with a token bucket:
+    up to `burst` events back to back, then one event per `rate_limit`
+    seconds. Messages and callback queries have separate buckets.
+    State is kept in process memory unless another storage is passed.
+
+    Handlers can override limits with the `throttling` flag. Overridden
+    handlers get their own bucket (named after the handler unless `scope`
+    is given), `False` disables throttling for the handler.
+
+    Must be registered as inner middleware, since handler flags
+    are not resolved yet in outer middlewares.
 
     Usage:
-        dp.message.outer_middleware(ThrottlingMiddleware(rate_limit=0.5))
+        dp.message.middleware(ThrottlingMiddleware(rate_limit=0.5, burst=3))
+        dp.callback_query.middleware(ThrottlingMiddleware(storage=redis_storage))
+
+        @router.message(Command("stats"), flags={"throttling": {"rate_limit": 10}})
+        async def cmd_stats(message: Message): ...
     """
 
     def __init__(
         self,
         rate_limit: float = 0.5,
+        burst: int = 3,
         max_users: int = 10000,
         throttle_message: Optional[str] = None,
+        storage: Optional[BaseThrottlingStorage] = None,
     ) -> None:
         """
         Args:
-            rate_limit: Minimum seconds between messages per user
+            rate_limit: Seconds it takes to regain one event per user
+            burst: Number of events a user can send back to back
             max_users: Maximum number of users to track
             throttle_message: Optional message to send when throttled
+            storage: Throttling state storage, in-memory by default
         """
-        self.cache: TTLCache = TTLCache(maxsize=max_users, ttl=rate_limit)
+        if storage is None:
+            storage = MemoryThrottlingStorage(max_users=max_users)
+
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.storage = storage
         self.throttle_message = throttle_message
+        self.throttled = 0
+
+    def set_limits(self, rate_limit: float, burst: int) -> None:
+        """
+        Change default limits, e.g. after configuration was reloaded.
+
+        Args:
+            rate_limit: Seconds it takes to regain one event per user
+            burst: Number of events a user can send back to back
+        """
+        self.rate_limit = rate_limit
+        self.burst = burst
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get throttling counters.
+
+        Returns:
+            Dict with the number of throttled events
+        """
+        return {"throttled": self.throttled}
 
     async def __call__(
         self,
@@ -42,12 +88,25 @@ class ThrottlingMiddleware(BaseMiddleware):
         if event.from_user is None:
             return await handler(event, data)
 
-        user_id = event.from_user.id
+        rate_limit = self.rate_limit
+        burst = self.burst
+        scope = "message" if isinstance(event, Message) else "callback_query"
+
+        flag = get_flag(data, "throttling")
+        if flag is False:
+            return await handler(event, data)
+        if isinstance(flag, dict):
+            rate_limit = flag.get("rate_limit", rate_limit)
+            burst = flag.get("burst", burst)
+            scope = flag.get("scope") or data["handler"].callback.__name__
 
-        if user_id in self.cache:
-            if self.throttle_message and isinstance(event, Message):
+        if not await self.storage.acquire(event.from_user.id, rate_limit, burst, scope):
+            self.throttled += 1
+            if isinstance(event, CallbackQuery):
+                # Unanswered queries keep a loading indicator on the button
+                await event.answer(self.throttle_message)
+            elif self.throttle_message:
                 await event.answer(self.throttle_message)
             return None
 
-        self.cache[user_id] = True
         return await handler(event, data)
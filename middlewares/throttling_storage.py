@@ -0,0 +1,179 @@
+"""
+Storages for ThrottlingMiddleware state.
+
+Both storages implement a token bucket as GCRA (generic cell rate algorithm):
+instead of a token counter and a refill timestamp, each key keeps a single
+"theoretical arrival time" float, which is all a bucket needs.
+
+RedisThrottlingStorage requires: pip install redis
+"""
+from abc import ABC, abstractmethod
+from time import monotonic
+
+try:
+    from redis.asyncio import Redis
+except ImportError:
+    Redis = None
+
+
+DEFAULT_SCOPE = "default"
+
+
+class BaseThrottlingStorage(ABC):
+    """
+    Abstract base class for throttling storages.
+
+    Implement this class to keep rate limiting state somewhere shared
+    between bot replicas (Redis, Memcached, etc.)
+    """
+
+    @abstractmethod
+    async def acquire(
+        self,
+        key: int,
+        rate_limit: float,
+        burst: int = 1,
+        scope: str = DEFAULT_SCOPE,
+    ) -> bool:
+        """
+        Atomically take one token from the bucket of key.
+
+        Args:
+            key: Throttled entity ID (usually Telegram user ID)
+            rate_limit: Seconds it takes to refill one token
+            burst: Bucket capacity, i.e. events allowed back to back
+            scope: Bucket namespace, so handlers can have separate limits
+
+        Returns:
+            True if the event is allowed, False if it should be throttled
+        """
+        ...
+
+    async def close(self) -> None:
+        """Close storage connection."""
+        pass
+
+
+class MemoryThrottlingStorage(BaseThrottlingStorage):
+    """
+    Process-local throttling storage.
+
+    Only limits events handled by the current process. Keeps one float per
+    tracked key; keys whose bucket has refilled are pruned once more than
+    `max_users` keys are tracked in a scope.
+    """
+
+    def __init__(self, max_users: int = 10000) -> None:
+        """
+        Args:
+            max_users: Maximum number of keys to track per scope
+        """
+        self.max_users = max_users
+        self._scopes: dict[str, dict[int, float]] = {}
+
+    async def acquire(
+        self,
+        key: int,
+        rate_limit: float,
+        burst: int = 1,
+        scope: str = DEFAULT_SCOPE,
+    ) -> bool:
+        buckets = self._scopes.get(scope)
+        if buckets is None:
+            buckets = self._scopes[scope] = {}
+
+        now = monotonic()
+        tat = max(buckets.get(key, now), now)
+
+        if tat - now > rate_limit * (burst - 1):
+            return False
+
+        if key not in buckets and len(buckets) >= self.max_users:
+            self._prune(buckets, now)
+
+        buckets[key] = tat + rate_limit
+        return True
+
+    def _prune(self, buckets: dict[int, float], now: float) -> None:
+        # Refilled buckets behave exactly like untracked ones
+        for key in [key for key, tat in buckets.items() if tat <= now]:
+            del buckets[key]
+
+        # Still full of active keys: forget the oldest tenth
+        overflow = len(buckets) - self.max_users * 9 // 10
+        if overflow > 0:
+            for key in list(buckets)[:overflow]:
+                del buckets[key]
+
+
+class RedisThrottlingStorage(BaseThrottlingStorage):
+    """
+    Redis throttling storage shared by all bot replicas.
+
+    Check and update is a single Lua script call using Redis server time,
+    so replicas with skewed clocks still share one consistent bucket.
+
+    Usage:
+        storage = RedisThrottlingStorage.from_url("redis://localhost:6379/0")
+        dp.message.middleware(ThrottlingMiddleware(storage=storage))
+        # ...
+        await storage.close()
+    """
+
+    ACQUIRE_SCRIPT = """
+        local time = redis.call('TIME')
+        local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+        local interval = tonumber(ARGV[1])
+        local tolerance = tonumber(ARGV[2])
+        local tat = tonumber(redis.call('GET', KEYS[1])) or now
+        if tat < now then
+            tat = now
+        end
+        if tat - now > tolerance then
+            return 0
+        end
+        tat = tat + interval
+        redis.call('SET', KEYS[1], tat, 'PX', tat - now)
+        return 1
+    """
+
+    def __init__(self, redis: "Redis", prefix: str = "throttling") -> None:
+        """
+        Args:
+            redis: Redis client instance
+            prefix: Prefix for Redis keys
+        """
+        self.redis = redis
+        self.prefix = prefix
+        self._acquire = redis.register_script(self.ACQUIRE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "throttling") -> "RedisThrottlingStorage":
+        """
+        Create storage with a new Redis client.
+
+        Args:
+            url: Redis connection URL
+            prefix: Prefix for Redis keys
+        """
+        if Redis is None:
+            raise ImportError("redis is required. Install with: pip install redis")
+
+        return cls(Redis.from_url(url), prefix=prefix)
+
+    async def acquire(
+        self,
+        key: int,
+        rate_limit: float,
+        burst: int = 1,
+        scope: str = DEFAULT_SCOPE,
+    ) -> bool:
+        interval_ms = max(1, int(rate_limit * 1000))
+        result = await self._acquire(
+            keys=[f"{self.prefix}:{scope}:{key}"],
+            args=[interval_ms, interval_ms * (burst - 1)],
+        )
+        return bool(result)
+
+    async def close(self) -> None:
+        await self.redis.aclose()
@@ -0,0 +1,33 @@
+import asyncio
+
+from utils.admin_index import ChatAdminIndex
+
+
+class FailingBot:
+    """Answers getChatAdministrators, except the first refresh which fails."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def get_chat_administrators(self, chat_id):
+        self.calls += 1
+        if self.calls == 2:
+            raise RuntimeError("unexpected")
+        return []
+
+
+async def test_refresh_survives_unexpected_errors():
+    bot = FailingBot()
+    admin_index = ChatAdminIndex(refresh_interval=0.01)
+    await admin_index.get_admins(bot, -1)
+    admin_index.start(bot)
+
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        admin_index._accessed.add(-1)  # Keep the chat refreshed
+        if bot.calls >= 3:
+            break
+
+    assert bot.calls >= 3
+    assert not admin_index._refresh_task.done()
+    await admin_index.close()
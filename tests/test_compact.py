@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+import db.compact
+from db import CompactMemoryRepository, MemoryRepository
+
+FIELDS = db.compact.TEXT_FIELDS + db.compact.CODE_FIELDS
+
+
+def normalize(user):
+    # CompactMemoryRepository returns unset schema fields as None
+    return {"user_id": user["user_id"], **dict.fromkeys(FIELDS), **user}
+
+
+@pytest.fixture(autouse=True)
+def sort_often(monkeypatch):
+    monkeypatch.setattr(db.compact, "MIN_UNSORTED_ROWS", 8)
+
+
+async def test_matches_memory_repository():
+    rnd = random.Random(0)
+    values = [None, "", "a", "ab" * 4, "é€", "x" * 20000, 5, "en", "ru"]
+    repo, expected = CompactMemoryRepository(), MemoryRepository()
+
+    for _ in range(5000):
+        op, user_id = rnd.random(), rnd.randrange(300)
+        if op < 0.5:
+            data = {f: rnd.choice(values) for f in FIELDS + ("extra",) if rnd.random() < 0.4}
+            await repo.save_user(user_id, data)
+            await expected.save_user(user_id, data)
+        elif op < 0.6:
+            users = {rnd.randrange(300): {"username": rnd.choice(values)} for _ in range(5)}
+            await repo.save_users(users)
+            await expected.save_users(users)
+        elif op < 0.75:
+            assert await repo.delete_user(user_id) == await expected.delete_user(user_id)
+        elif op < 0.8:
+            user_ids = [rnd.randrange(300) for _ in range(5)]
+            assert await repo.delete_users(user_ids) == await expected.delete_users(user_ids)
+        elif op < 0.9:
+            user = await expected.get_user(user_id)
+            assert await repo.get_user(user_id) == (user and normalize(user))
+        else:
+            page, cursor = await repo.get_users_page(user_id, 7)
+            expected_page, expected_cursor = await expected.get_users_page(user_id, 7)
+            assert page == [normalize(user) for user in expected_page]
+            assert cursor == expected_cursor
+        assert await repo.count_users() == await expected.count_users()
+
+    users = [user async for batch in repo.iter_users(batch_size=13, after_id=50) for user in batch]
+    expected_users = [
+        normalize(user)
+        async for batch in expected.iter_users(batch_size=13, after_id=50)
+        for user in batch
+    ]
+    assert users == expected_users
+
+
+async def test_returned_users_are_copies():
+    repo = CompactMemoryRepository()
+    await repo.save_user(1, {"username": "alice", "tags": ["a"]})
+
+    user = await repo.get_user(1)
+    user["username"] = "bob"
+
+    assert (await repo.get_user(1))["username"] == "alice"
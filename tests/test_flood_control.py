@@ -0,0 +1,134 @@
+import asyncio
+from time import monotonic
+
+import pytest
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramRetryAfter
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from middlewares.flood_control import FloodControlMiddleware
+
+TOKEN = "42:TEST"
+
+
+class FakeBotAPI:
+    """Bot API server recording sendMessage calls and answering 429 while asked to."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[float, int]] = []
+        self.flood_responses = 0
+        self.retry_after = 1
+        self.url = ""
+
+    async def handle(self, request: web.Request) -> web.Response:
+        data = await request.post()
+        chat_id = int(data["chat_id"])
+        self.calls.append((monotonic(), chat_id))
+
+        if self.flood_responses > 0:
+            self.flood_responses -= 1
+            return web.json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }, status=429)
+
+        return web.json_response({
+            "ok": True,
+            "result": {
+                "message_id": len(self.calls),
+                "date": 0,
+                "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+                "text": data["text"],
+            },
+        })
+
+    def times(self, chat_id: int) -> list[float]:
+        return [at for at, chat in self.calls if chat == chat_id]
+
+
+@pytest.fixture
+async def api():
+    api = FakeBotAPI()
+    app = web.Application()
+    app.router.add_post(f"/bot{TOKEN}/sendMessage", api.handle)
+    server = TestServer(app)
+    await server.start_server()
+    api.url = str(server.make_url(""))
+    yield api
+    await server.close()
+
+
+async def make_bot(api: FakeBotAPI, flood_control: FloodControlMiddleware) -> Bot:
+    session = AiohttpSession(api=TelegramAPIServer.from_base(api.url.rstrip("/")))
+    session.middleware(flood_control)
+    return Bot(TOKEN, session=session)
+
+
+def gaps(times: list[float]) -> list[float]:
+    return [b - a for a, b in zip(times, times[1:])]
+
+
+async def test_messages_to_one_chat_are_spaced(api):
+    flood_control = FloodControlMiddleware(
+        global_rate=1000, private_chat_interval=0.2, group_chat_interval=0.3,
+    )
+    bot = await make_bot(api, flood_control)
+    try:
+        await asyncio.gather(
+            *(bot.send_message(1, "private") for _ in range(3)),
+            *(bot.send_message(-1, "group") for _ in range(2)),
+            bot.send_message(2, "other"),
+        )
+    finally:
+        await bot.session.close()
+
+    assert all(gap >= 0.19 for gap in gaps(api.times(1)))
+    assert all(gap >= 0.29 for gap in gaps(api.times(-1)))
+    # Other chats don't wait for the chats above
+    assert api.times(2)[0] - api.calls[0][0] < 0.1
+
+
+async def test_messages_are_spaced_globally(api):
+    flood_control = FloodControlMiddleware(global_rate=20, private_chat_interval=0)
+    bot = await make_bot(api, flood_control)
+    try:
+        await asyncio.gather(*(bot.send_message(chat_id, "hi") for chat_id in range(1, 6)))
+    finally:
+        await bot.session.close()
+
+    assert len(api.calls) == 5
+    assert all(gap >= 0.045 for gap in gaps(sorted(at for at, _ in api.calls)))
+
+
+async def test_retry_after_is_honored(api):
+    api.flood_responses = 1
+    flood_control = FloodControlMiddleware(private_chat_interval=0)
+    bot = await make_bot(api, flood_control)
+    try:
+        message = await bot.send_message(1, "hi")
+    finally:
+        await bot.session.close()
+
+    assert message.text == "hi"
+    first, second = api.times(1)
+    assert second - first >= 0.99
+    assert flood_control.stats()["retry_after_hits"] == 1
+
+
+async def test_retry_after_is_reraised_after_max_retries(api):
+    api.flood_responses = 10
+    flood_control = FloodControlMiddleware(private_chat_interval=0, max_retries=2)
+    bot = await make_bot(api, flood_control)
+    try:
+        with pytest.raises(TelegramRetryAfter):
+            await bot.send_message(1, "hi")
+    finally:
+        await bot.session.close()
+
+    assert len(api.calls) == 3
+    assert flood_control.stats()["retry_after_hits"] == 3
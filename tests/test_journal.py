@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from db import CompactMemoryRepository, JournaledRepository, MemoryRepository
+from db.journal import SNAPSHOT_MAGIC
+
+
+@pytest.fixture(params=[MemoryRepository, CompactMemoryRepository])
+def repo_class(request):
+    return request.param
+
+
+async def open_repo(path, repo_class, **kwargs) -> JournaledRepository:
+    repo = JournaledRepository(repo_class(), path, fsync_interval=60, **kwargs)
+    await repo.init()
+    return repo
+
+
+async def test_log_is_replayed(tmp_path, repo_class):
+    repo = await open_repo(tmp_path / "users", repo_class)
+    await repo.save_user(1, {"username": "alice"})
+    await repo.save_users({2: {"username": "bob"}, 3: {"username": "carol"}})
+    await repo.save_user(1, {"locale": "ru"})
+    await repo.delete_user(3)
+    await repo.close()
+
+    repo = await open_repo(tmp_path / "users", repo_class)
+    users = await repo.get_users([1, 2, 3])
+    await repo.close()
+
+    assert sorted(users) == [1, 2]
+    assert users[1]["username"] == "alice"
+    assert users[1]["locale"] == "ru"
+
+
+async def test_torn_log_tail_is_dropped(tmp_path, repo_class):
+    repo = await open_repo(tmp_path / "users", repo_class)
+    await repo.save_user(1, {"username": "alice"})
+    await repo.flush()
+    log_path = repo._log_path(repo._generation)
+    valid_size = log_path.stat().st_size
+    await repo.save_user(2, {"username": "bob"})
+    await repo.close()
+
+    # Crash in the middle of the last record
+    os.truncate(log_path, log_path.stat().st_size - 3)
+
+    repo = await open_repo(tmp_path / "users", repo_class)
+    assert log_path.stat().st_size == valid_size
+    await repo.save_user(3, {"username": "carol"})
+    await repo.close()
+
+    repo = await open_repo(tmp_path / "users", repo_class)
+    users = await repo.get_users([1, 2, 3])
+    await repo.close()
+
+    # Records written after the truncated tail are replayed
+    assert sorted(users) == [1, 3]
+
+
+async def test_snapshot_and_log_are_recovered(tmp_path, repo_class):
+    repo = await open_repo(tmp_path / "users", repo_class)
+    await repo.save_users({user_id: {"username": f"u{user_id}"} for user_id in range(1, 6)})
+    await repo.compact()
+    await repo.save_user(1, {"username": "renamed"})
+    await repo.delete_user(2)
+    await repo.save_user(6, {"username": "u6"})
+    await repo.close()
+
+    logs = sorted(path.name for path in tmp_path.glob("users.*.log"))
+    assert logs == ["users.1.log"]
+    assert (tmp_path / "users.snapshot").read_bytes().startswith(SNAPSHOT_MAGIC)
+
+    repo = await open_repo(tmp_path / "users", repo_class)
+    users = {user["user_id"]: user for user in await repo.get_all_users()}
+    await repo.close()
+
+    assert sorted(users) == [1, 3, 4, 5, 6]
+    assert users[1]["username"] == "renamed"
+    assert users[5]["username"] == "u5"
+
+
+async def test_compaction_keeps_stored_users_intact(tmp_path):
+    repo = await open_repo(tmp_path / "users", MemoryRepository, compact_after=3)
+    await repo.save_users({user_id: {"username": f"u{user_id}"} for user_id in range(1, 4)})
+    await repo._compact_task
+
+    # Snapshot is encoded from copies, stored dicts keep their user_id
+    assert await repo.get_user(2) == {"user_id": 2, "username": "u2"}
+    await repo.close()
+
+    repo = await open_repo(tmp_path / "users", MemoryRepository)
+    assert await repo.get_user(2) == {"user_id": 2, "username": "u2"}
+    await repo.close()
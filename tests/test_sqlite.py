@@ -0,0 +1,56 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from db.sqlite import SQLiteRepository  # noqa: E402
+
+
+@pytest.fixture(params=["wal", "delete"])
+async def repo(request, tmp_path):
+    # Without WAL reads share the writer connection
+    repo = SQLiteRepository(str(tmp_path / "bot.db"), journal_mode=request.param)
+    await repo.init()
+    yield repo
+    await repo.close()
+
+
+async def test_failed_save_users_leaves_nothing_behind(repo):
+    results = await asyncio.gather(
+        repo.save_users({1: {"username": "alice"}, 2: {"no_such_column": "x"}}),
+        repo.save_user(99, {"username": "bob"}),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[0], sqlite3.OperationalError)
+    assert results[1] is None
+    assert await repo.get_user(1) is None
+    assert (await repo.get_user(99))["username"] == "bob"
+
+
+async def test_failed_save_users_keeps_concurrent_writes(repo):
+    # The bulk rollback must not discard a single write that already succeeded
+    await asyncio.gather(
+        repo.save_user(99, {"username": "bob"}),
+        repo.save_users({1: {"username": "alice"}, 2: {"no_such_column": "x"}}),
+        repo.delete_user(100),
+        return_exceptions=True,
+    )
+
+    assert (await repo.get_user(99))["username"] == "bob"
+    assert await repo.get_user(1) is None
+
+
+async def test_bulk_operations(repo):
+    await repo.save_users({user_id: {"username": f"u{user_id}"} for user_id in range(1, 6)})
+    await repo.save_users({1: {"locale": "ru"}})
+
+    users = await repo.get_users([1, 2, 100])
+    assert sorted(users) == [1, 2]
+    assert users[1]["username"] == "u1"
+    assert users[1]["locale"] == "ru"
+
+    assert await repo.delete_users([1, 2, 100]) == 2
+    assert await repo.count_users() == 3
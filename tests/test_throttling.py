@@ -0,0 +1,33 @@
+import pytest
+from aiogram.types import CallbackQuery, User
+
+from middlewares.throttling import ThrottlingMiddleware
+
+
+@pytest.fixture
+def answers(monkeypatch):
+    answers = []
+
+    async def answer(self, text=None, **kwargs):
+        answers.append(text)
+
+    monkeypatch.setattr(CallbackQuery, "answer", answer)
+    return answers
+
+
+async def handler(event, data):
+    return "handled"
+
+
+def callback_query() -> CallbackQuery:
+    user = User(id=1, is_bot=False, first_name="Alice")
+    return CallbackQuery(id="1", from_user=user, chat_instance="1", data="button")
+
+
+@pytest.mark.parametrize("throttle_message", [None, "Too fast"])
+async def test_throttled_callback_query_is_answered(answers, throttle_message):
+    middleware = ThrottlingMiddleware(rate_limit=60, burst=1, throttle_message=throttle_message)
+
+    assert await middleware(handler, callback_query(), {}) == "handled"
+    assert await middleware(handler, callback_query(), {}) is None
+    assert answers == [throttle_message]
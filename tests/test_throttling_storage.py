@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from middlewares.throttling_storage import MemoryThrottlingStorage, RedisThrottlingStorage
+
+try:
+    import fakeredis
+    import lupa  # noqa: F401  fakeredis runs Lua scripts with it
+except ImportError:
+    fakeredis = None
+
+RATE_LIMIT = 0.1
+BURST = 3
+
+
+@pytest.fixture(params=["memory", "redis"])
+async def storage(request):
+    if request.param == "memory":
+        storage = MemoryThrottlingStorage()
+    else:
+        if fakeredis is None:
+            pytest.skip("fakeredis[lua] is required")
+        storage = RedisThrottlingStorage(fakeredis.FakeAsyncRedis())
+    yield storage
+    await storage.close()
+
+
+async def test_burst_is_admitted_then_refused(storage):
+    results = [await storage.acquire(1, RATE_LIMIT, BURST) for _ in range(BURST + 1)]
+
+    assert results == [True] * BURST + [False]
+
+
+async def test_token_refills_after_emission_interval(storage):
+    for _ in range(BURST):
+        assert await storage.acquire(1, RATE_LIMIT, BURST)
+    assert not await storage.acquire(1, RATE_LIMIT, BURST)
+
+    await asyncio.sleep(RATE_LIMIT * 1.5)
+
+    # One interval refills one token, not the whole burst
+    assert await storage.acquire(1, RATE_LIMIT, BURST)
+    assert not await storage.acquire(1, RATE_LIMIT, BURST)
+
+
+async def test_keys_and_scopes_have_separate_buckets(storage):
+    assert await storage.acquire(1, RATE_LIMIT)
+    assert not await storage.acquire(1, RATE_LIMIT)
+
+    assert await storage.acquire(2, RATE_LIMIT)
+    assert await storage.acquire(1, RATE_LIMIT, scope="other")
+
+
+async def test_memory_storage_prunes_refilled_keys():
+    storage = MemoryThrottlingStorage(max_users=10)
+    for key in range(10):
+        assert await storage.acquire(key, 0.01)
+    await asyncio.sleep(0.02)
+
+    assert await storage.acquire(100, 0.01)
+    assert list(storage._scopes["default"]) == [100]
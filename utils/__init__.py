@@ -0,0 +1,20 @@
+from .admin_index import ChatAdminIndex
+from .broadcast import Broadcaster, BroadcastState, BroadcastStatus
+from .loop_monitor import LoopLagMonitor
+from .member_cache import ChatMemberCache
+from .metrics_server import MetricsServer
+from .profiler import ProfileKind, Profiler
+from .reloader import HotReloader
+
+__all__ = [
+    "Broadcaster",
+    "BroadcastState",
+    "BroadcastStatus",
+    "ChatAdminIndex",
+    "ChatMemberCache",
+    "HotReloader",
+    "LoopLagMonitor",
+    "MetricsServer",
+    "ProfileKind",
+    "Profiler",
+]
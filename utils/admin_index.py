@@ -0,0 +1,179 @@
+import asyncio
+from time import monotonic
+from typing import Optional
+
+import structlog
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import (
+    ChatMember,
+    ChatMemberAdministrator,
+    ChatMemberOwner,
+    ChatMemberUpdated,
+)
+from cachetools import LRUCache
+
+
+logger = structlog.get_logger()
+
+AdminsMap = dict[int, ChatMember]
+
+
+class ChatAdminIndex:
+    """
+    Per-chat index of chat administrators.
+
+    Each chat is filled by a single getChatAdministrators call, refreshed
+    in background while it is being checked and patched in place from
+    ChatMemberUpdated events, so admin checks become dict lookups without
+    network I/O. Chats not checked since the last refresh are left to
+    expire after `ttl` and are reloaded on next access.
+    Concurrent misses for the same chat share one in-flight request.
+
+    Usage:
+        admin_index = ChatAdminIndex(refresh_interval=300)
+        admin_index.start(bot)
+        admins = await admin_index.get_admins(bot, chat_id)
+        is_admin = user_id in admins
+        # ...
+        await admin_index.close()
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = 300.0,
+        ttl: float = 600.0,
+        max_chats: int = 10000,
+    ) -> None:
+        """
+        Args:
+            refresh_interval: Seconds between background refreshes of a chat
+            ttl: Seconds after which a chat is reloaded on access
+            max_chats: Maximum number of indexed chats
+        """
+        self.refresh_interval = refresh_interval
+        self.ttl = ttl
+        self._chats: LRUCache = LRUCache(maxsize=max_chats)
+        self._in_flight: dict[int, asyncio.Task] = {}
+        self._accessed: set[int] = set()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.api_calls = 0
+
+    async def get_admins(self, bot: Bot, chat_id: int) -> AdminsMap:
+        """
+        Get administrators of a chat.
+
+        Private chats (positive IDs) have no administrators
+        and are answered without an API call.
+
+        Args:
+            bot: Bot instance used on miss
+            chat_id: Telegram chat ID
+
+        Returns:
+            Dict of user ID to ChatMember
+        """
+        if chat_id > 0:
+            return {}
+
+        self._accessed.add(chat_id)
+        entry: Optional[tuple[float, AdminsMap]] = self._chats.get(chat_id)
+        if entry is not None and monotonic() - entry[0] < self.ttl:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        return await self._load(bot, chat_id)
+
+    async def _load(self, bot: Bot, chat_id: int) -> AdminsMap:
+        task = self._in_flight.get(chat_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(bot, chat_id))
+            self._in_flight[chat_id] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(chat_id, None))
+
+        # Shield so that a cancelled waiter doesn't cancel the shared request
+        return await asyncio.shield(task)
+
+    async def _fetch(self, bot: Bot, chat_id: int) -> AdminsMap:
+        self.api_calls += 1
+        members = await bot.get_chat_administrators(chat_id)
+        admins = {member.user.id: member for member in members}
+        self._chats[chat_id] = (monotonic(), admins)
+        return admins
+
+    def handle_update(self, event: ChatMemberUpdated) -> None:
+        """Apply member status change to an already indexed chat."""
+        entry: Optional[tuple[float, AdminsMap]] = self._chats.get(event.chat.id)
+        if entry is None:
+            return
+
+        member = event.new_chat_member
+        if isinstance(member, (ChatMemberAdministrator, ChatMemberOwner)):
+            entry[1][member.user.id] = member
+        else:
+            entry[1].pop(member.user.id, None)
+
+    def invalidate(self, chat_id: int) -> None:
+        """Drop indexed chat, if any."""
+        self._chats.pop(chat_id, None)
+
+    def start(self, bot: Bot) -> None:
+        """Start background refresh task."""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(bot))
+
+    async def close(self) -> None:
+        """Stop background refresh task."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh_loop(self, bot: Bot) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+
+            # Idle chats aren't worth API calls, they expire and reload on demand
+            accessed, self._accessed = self._accessed, set()
+            now = monotonic()
+            stale = []
+            for chat_id in accessed:
+                entry: Optional[tuple[float, AdminsMap]] = self._chats.get(chat_id)
+                if entry is not None and now - entry[0] >= self.refresh_interval:
+                    stale.append(chat_id)
+
+            # One chat at a time to keep refresh traffic flat
+            for chat_id in stale:
+                try:
+                    await self._load(bot, chat_id)
+                except TelegramAPIError as e:
+                    # Bot was most likely removed from the chat
+                    self.invalidate(chat_id)
+                    await logger.adebug(
+                        "Failed to refresh chat admins",
+                        chat_id=chat_id,
+                        error=str(e),
+                    )
+                except Exception:
+                    # Keep refreshing other chats, the task isn't awaited until close()
+                    await logger.aexception("Failed to refresh chat admins", chat_id=chat_id)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get index counters.
+
+        Returns:
+            Dict with hits, misses, API calls and indexed chats count
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "api_calls": self.api_calls,
+            "chats": len(self._chats),
+        }
@@ -0,0 +1,301 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from enum import StrEnum, auto
+from pathlib import Path
+from time import monotonic
+from typing import Awaitable, Callable, Optional, Union
+from uuid import uuid4
+
+import structlog
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError
+from pydantic import BaseModel
+
+from db import BaseRepository
+from middlewares import SendPriority, send_priority
+
+
+logger = structlog.get_logger()
+
+
+class BroadcastStatus(StrEnum):
+    RUNNING = auto()
+    FINISHED = auto()
+    CANCELLED = auto()
+
+
+class BroadcastState(BaseModel):
+    """Broadcast progress, saved to checkpoint after every batch."""
+    id: str
+    status: BroadcastStatus = BroadcastStatus.RUNNING
+    owner_chat_id: int
+    text: Optional[str] = None  # either text...
+    from_chat_id: Optional[int] = None  # ...or a message to copy
+    message_id: Optional[int] = None
+    total: int = 0
+    last_user_id: Optional[int] = None
+    sent: int = 0
+    failed: int = 0
+    blocked: int = 0
+    started_at: datetime
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed + self.blocked
+
+
+ProgressCallback = Callable[[BroadcastState, float], Awaitable[None]]
+
+
+class Broadcaster:
+    """
+    Sends a message to every user in the repository.
+
+    Recipients are streamed from the repository in batches and each batch is
+    sent concurrently. Flood limits are left to FloodControlMiddleware, which
+    serves broadcast messages with low priority. Progress is checkpointed
+    to a JSON file after every batch, so an interrupted broadcast resumes
+    from the last finished batch. Users who blocked the bot are deleted
+    from the repository.
+
+    Usage:
+        broadcaster = Broadcaster(bot, repo, "data/broadcast.json")
+        await broadcaster.resume()  # on startup
+        await broadcaster.start(owner_chat_id, text="Hello everyone!")
+        # ...
+        await broadcaster.close()
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        repo: BaseRepository,
+        checkpoint_path: Union[str, Path] = "data/broadcast.json",
+        batch_size: int = 500,
+        concurrency: int = 25,
+        progress_interval: float = 5.0,
+    ) -> None:
+        """
+        Args:
+            bot: Bot instance to send messages with
+            repo: Repository with recipients
+            checkpoint_path: Path to broadcast checkpoint file
+            batch_size: Number of recipients loaded and checkpointed at once
+            concurrency: Maximum number of messages sent at once
+            progress_interval: Minimum seconds between progress callbacks
+        """
+        self.bot = bot
+        self.repo = repo
+        self.checkpoint_path = Path(checkpoint_path)
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.progress_interval = progress_interval
+        self.state: Optional[BroadcastState] = None
+        self._task: Optional[asyncio.Task] = None
+        self._run_started_at = 0.0
+        self._run_started_with = 0
+        self._run_finished_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def rate(self) -> float:
+        """Messages per second since the broadcast was (re)started."""
+        if self.state is None:
+            return 0.0
+        elapsed = (self._run_finished_at or monotonic()) - self._run_started_at
+        if elapsed <= 0:
+            return 0.0
+        return (self.state.processed - self._run_started_with) / elapsed
+
+    async def start(
+        self,
+        owner_chat_id: int,
+        text: Optional[str] = None,
+        from_chat_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> BroadcastState:
+        """
+        Start a new broadcast of either text or a copy of a message.
+
+        Args:
+            owner_chat_id: Chat of the owner who started the broadcast
+            text: Text to send
+            from_chat_id: Chat of the message to copy
+            message_id: ID of the message to copy
+            on_progress: Callback called with state and rate while sending
+
+        Returns:
+            Initial broadcast state
+
+        Raises:
+            RuntimeError: If another broadcast is running
+        """
+        if self.running:
+            raise RuntimeError("Another broadcast is already running")
+
+        state = BroadcastState(
+            id=uuid4().hex[:8],
+            owner_chat_id=owner_chat_id,
+            text=text,
+            from_chat_id=from_chat_id,
+            message_id=message_id,
+            total=await self.repo.count_users(),
+            started_at=datetime.now(timezone.utc),
+        )
+        await asyncio.to_thread(self._save_checkpoint, state)
+        self._launch(state, on_progress)
+        return state
+
+    async def resume(self) -> Optional[BroadcastState]:
+        """
+        Resume broadcast interrupted by a crash or restart, if any.
+
+        Returns:
+            Resumed broadcast state or None
+        """
+        if self.running or not self.checkpoint_path.exists():
+            return None
+
+        state = BroadcastState.model_validate_json(
+            await asyncio.to_thread(self.checkpoint_path.read_bytes)
+        )
+        if state.status != BroadcastStatus.RUNNING:
+            return None
+
+        await logger.ainfo(
+            "Resuming broadcast",
+            broadcast_id=state.id,
+            processed=state.processed,
+            total=state.total,
+        )
+        self._launch(state, None)
+        return state
+
+    def cancel(self) -> bool:
+        """
+        Cancel running broadcast.
+
+        Returns:
+            True if broadcast was cancelled, False if none was running
+        """
+        if not self.running or self.state is None:
+            return False
+
+        self.state.status = BroadcastStatus.CANCELLED
+        return True
+
+    async def close(self) -> None:
+        """Stop sending; a running broadcast stays checkpointed and resumes on next start."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                await logger.aerror("Broadcast task failed", error=str(e))
+            self._task = None
+
+    def _launch(self, state: BroadcastState, on_progress: Optional[ProgressCallback]) -> None:
+        self.state = state
+        self._run_started_at = monotonic()
+        self._run_started_with = state.processed
+        self._run_finished_at = None
+        self._task = asyncio.create_task(self._run(state, on_progress))
+
+    async def _run(self, state: BroadcastState, on_progress: Optional[ProgressCallback]) -> None:
+        # Interactive replies go first, broadcast takes the remaining rate
+        send_priority.set(SendPriority.LOW)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        reported_at = monotonic()
+
+        async def send(user_id: int) -> None:
+            async with semaphore:
+                await self._send(state, user_id)
+
+        try:
+            async for batch in self.repo.iter_users(
+                batch_size=self.batch_size,
+                after_id=state.last_user_id,
+            ):
+                if state.status != BroadcastStatus.RUNNING:
+                    break
+
+                await asyncio.gather(*(send(user["user_id"]) for user in batch))
+                state.last_user_id = batch[-1]["user_id"]
+                await asyncio.to_thread(self._save_checkpoint, state)
+
+                if on_progress is not None and monotonic() - reported_at >= self.progress_interval:
+                    reported_at = monotonic()
+                    await self._report(state, on_progress)
+        except Exception:
+            # Checkpoint stays RUNNING, so the broadcast resumes on next start
+            self._run_finished_at = monotonic()
+            await asyncio.to_thread(self._save_checkpoint, state)
+            await logger.aexception(
+                "Broadcast interrupted",
+                broadcast_id=state.id,
+                last_user_id=state.last_user_id,
+            )
+            return
+
+        self._run_finished_at = monotonic()
+        if state.status == BroadcastStatus.RUNNING:
+            state.status = BroadcastStatus.FINISHED
+        await asyncio.to_thread(self._save_checkpoint, state)
+
+        await logger.ainfo(
+            "Broadcast stopped",
+            broadcast_id=state.id,
+            status=state.status,
+            sent=state.sent,
+            failed=state.failed,
+            blocked=state.blocked,
+            rate=round(self.rate, 2),
+        )
+        if on_progress is not None:
+            await self._report(state, on_progress)
+
+    async def _send(self, state: BroadcastState, user_id: int) -> None:
+        try:
+            if state.text is not None:
+                await self.bot.send_message(user_id, state.text)
+            else:
+                await self.bot.copy_message(user_id, state.from_chat_id, state.message_id)
+            state.sent += 1
+        except TelegramForbiddenError:
+            # Bot was blocked or user is deactivated, no point in keeping them
+            state.blocked += 1
+            try:
+                await self.repo.delete_user(user_id)
+            except Exception as e:
+                await logger.awarning(
+                    "Failed to delete blocked user", user_id=user_id, error=str(e),
+                )
+        except TelegramAPIError as e:
+            state.failed += 1
+            await logger.adebug("Broadcast message failed", user_id=user_id, error=str(e))
+        except Exception:
+            # One broken recipient must not abort the batch and lose its checkpoint
+            state.failed += 1
+            await logger.aexception("Unexpected error sending broadcast message", user_id=user_id)
+
+    async def _report(self, state: BroadcastState, on_progress: ProgressCallback) -> None:
+        try:
+            await on_progress(state, self.rate)
+        except TelegramAPIError as e:
+            await logger.awarning("Failed to report broadcast progress", error=str(e))
+
+    def _save_checkpoint(self, state: BroadcastState) -> None:
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(state.model_dump_json())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
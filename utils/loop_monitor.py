@@ -0,0 +1,119 @@
+import asyncio
+import sys
+import threading
+import traceback
+from time import monotonic
+from typing import Any, Optional
+
+import structlog
+
+
+logger = structlog.get_logger()
+
+
+class LoopLagMonitor:
+    """
+    Watchdog logging what blocks the event loop.
+
+    A task on the loop records a heartbeat every `interval` seconds, and a
+    watchdog thread checks it. When the heartbeat is more than `threshold`
+    seconds late, the callback running on the loop is blocking it, and the
+    stack of the loop thread is logged once for that stall. Lag of every
+    heartbeat is tracked for stats().
+
+    Usage:
+        monitor = LoopLagMonitor(threshold=0.25)
+        monitor.start()
+        # ...
+        await monitor.close()
+    """
+
+    MAX_STACK_FRAMES = 30
+
+    def __init__(self, threshold: float = 0.25, interval: float = 0.05) -> None:
+        """
+        Args:
+            threshold: Seconds the loop may be blocked before its stack is logged
+            interval: Seconds between heartbeats
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self._heartbeat = monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.stalls = 0
+        self.lag_max = 0.0
+        self.lag_total = 0.0
+        self.beats = 0
+
+    def start(self) -> None:
+        """Start heartbeats on the running loop and the watchdog thread."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._beat())
+        self._thread = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._thread.start()
+
+    async def close(self) -> None:
+        """Stop monitoring."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get event loop lag counters.
+
+        Returns:
+            Dict with the number of logged stalls and heartbeat lag
+        """
+        return {
+            "stalls": self.stalls,
+            "lag_avg": self.lag_total / self.beats if self.beats else 0.0,
+            "lag_max": self.lag_max,
+        }
+
+    async def _beat(self) -> None:
+        while True:
+            expected = monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = monotonic()
+            self._heartbeat = now
+
+            lag = now - expected
+            self.beats += 1
+            self.lag_total += lag
+            self.lag_max = max(self.lag_max, lag)
+
+    def _watch(self) -> None:
+        reported: Optional[float] = None
+        while not self._stop.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            blocked = monotonic() - heartbeat - self.interval
+            if blocked < self.threshold or heartbeat == reported:
+                continue
+
+            # One report per stall, the heartbeat changes once the loop runs again
+            reported = heartbeat
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = traceback.format_stack(frame, limit=self.MAX_STACK_FRAMES) if frame else []
+            logger.warning(
+                "Event loop blocked",
+                blocked=round(blocked, 3),
+                stack="".join(stack),
+            )
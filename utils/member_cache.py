@@ -0,0 +1,74 @@
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.types import ChatMember, ChatMemberUpdated
+from cachetools import TTLCache
+
+
+class ChatMemberCache:
+    """
+    TTL cache for chat member lookups, keyed by (chat_id, user_id).
+
+    Entries expire after `ttl` seconds, the least recently used ones are
+    evicted when the cache is full, and ChatMemberUpdated events drop the
+    affected member right away.
+
+    Usage:
+        member_cache = ChatMemberCache(ttl=60, max_size=10000)
+        member = await member_cache.get_member(bot, chat_id, user_id)
+    """
+
+    def __init__(self, ttl: float = 60.0, max_size: int = 10000) -> None:
+        """
+        Args:
+            ttl: Seconds to keep a member in cache
+            max_size: Maximum number of cached members
+        """
+        self._cache: TTLCache = TTLCache(maxsize=max_size, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    async def get_member(self, bot: Bot, chat_id: int, user_id: int) -> ChatMember:
+        """
+        Get chat member from cache or Bot API.
+
+        Args:
+            bot: Bot instance used on cache miss
+            chat_id: Telegram chat ID
+            user_id: Telegram user ID
+
+        Returns:
+            ChatMember object
+        """
+        key = (chat_id, user_id)
+        member: Optional[ChatMember] = self._cache.get(key)
+
+        if member is not None:
+            self.hits += 1
+            return member
+
+        self.misses += 1
+        member = await bot.get_chat_member(chat_id, user_id)
+        self._cache[key] = member
+        return member
+
+    def invalidate(self, chat_id: int, user_id: int) -> None:
+        """Drop cached member, if any."""
+        self._cache.pop((chat_id, user_id), None)
+
+    def handle_update(self, event: ChatMemberUpdated) -> None:
+        """Invalidate member whose status was changed by a ChatMemberUpdated event."""
+        self.invalidate(event.chat.id, event.new_chat_member.user.id)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dict with hits, misses and current size
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._cache),
+        }
@@ -0,0 +1,67 @@
+from typing import Optional
+
+import structlog
+from aiohttp import web
+
+from middlewares.metrics import BotMetrics
+
+
+logger = structlog.get_logger()
+
+
+class MetricsServer:
+    """
+    Small aiohttp server exposing metrics for Prometheus to scrape.
+
+    Runs on its own host and port, independent of polling or the webhook
+    server, so metrics can stay on an internal interface.
+
+    Usage:
+        server = MetricsServer(metrics, port=9090)
+        await server.start()
+        # ...
+        await server.close()
+    """
+
+    def __init__(
+        self,
+        metrics: BotMetrics,
+        host: str = "127.0.0.1",
+        port: int = 9090,
+        path: str = "/metrics",
+    ) -> None:
+        """
+        Args:
+            metrics: Metrics to serve
+            host: Interface to listen on
+            port: Port to listen on
+            path: URL path of metrics
+        """
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.path = path
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> None:
+        """Start serving metrics."""
+        app = web.Application()
+        app.router.add_get(self.path, self._handle)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host=self.host, port=self.port).start()
+        await logger.ainfo("Metrics server started", host=self.host, port=self.port, path=self.path)
+
+    async def close(self) -> None:
+        """Stop serving metrics."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        # Content type carries a version parameter, which aiohttp's content_type rejects
+        return web.Response(
+            body=self.metrics.render(),
+            headers={"Content-Type": self.metrics.content_type},
+        )
@@ -0,0 +1,186 @@
+import asyncio
+import cProfile
+import io
+import pstats
+import tracemalloc
+from enum import StrEnum, auto
+from time import monotonic
+from typing import Awaitable, Callable, Optional, Union
+
+import structlog
+
+
+logger = structlog.get_logger()
+
+ReportCallback = Callable[[str], Awaitable[None]]
+
+
+class ProfileKind(StrEnum):
+    CPU = auto()
+    MEMORY = auto()
+
+
+class Profiler:
+    """
+    Time-boxed cProfile or tracemalloc capture of the running bot.
+
+    One capture runs at a time. It stops after `duration` seconds or on
+    stop(), then a text report is built in a worker thread and passed to
+    the callback: the top functions by cumulative and own time for CPU,
+    the top allocation sites and their growth during the capture for memory.
+
+    cProfile only sees the thread that enabled it, which is the event loop
+    thread, so worker threads (aiosqlite, log writer) aren't profiled.
+
+    Usage:
+        profiler = Profiler(max_duration=300)
+        profiler.start(ProfileKind.CPU, 30, on_report)
+        # ...
+        await profiler.close()
+    """
+
+    def __init__(self, max_duration: float = 300.0, top: int = 30) -> None:
+        """
+        Args:
+            max_duration: Maximum capture length in seconds
+            top: Number of functions or allocation sites in reports
+        """
+        self.max_duration = max_duration
+        self.top = top
+        self.kind: Optional[ProfileKind] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, kind: ProfileKind, duration: float, on_report: ReportCallback) -> float:
+        """
+        Start a capture.
+
+        Args:
+            kind: What to capture
+            duration: Capture length in seconds, capped at max_duration
+            on_report: Coroutine function receiving the report
+
+        Returns:
+            Capture length in seconds
+
+        Raises:
+            RuntimeError: If a capture is already running
+        """
+        if self.running:
+            raise RuntimeError("Profiling is already running")
+
+        duration = min(max(duration, 1.0), self.max_duration)
+        self.kind = kind
+        self._stop.clear()
+        self._task = asyncio.create_task(self._capture(kind, duration, on_report))
+        return duration
+
+    def stop(self) -> bool:
+        """
+        Stop the running capture early, its report is still delivered.
+
+        Returns:
+            False if no capture was running
+        """
+        if not self.running:
+            return False
+        self._stop.set()
+        return True
+
+    async def close(self) -> None:
+        """Abort the running capture without a report."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _capture(self, kind: ProfileKind, duration: float, on_report: ReportCallback) -> None:
+        started = monotonic()
+        try:
+            if kind == ProfileKind.CPU:
+                report = await self._capture_cpu(duration)
+            else:
+                report = await self._capture_memory(duration)
+            header = f"{kind.value} profile, {monotonic() - started:.1f} s\n\n"
+            await on_report(header + report)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await logger.aexception("Failed to deliver profile report", kind=kind.value)
+        finally:
+            self._task = None
+            self.kind = None
+
+    async def _wait(self, duration: float) -> None:
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=duration)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _capture_cpu(self, duration: float) -> str:
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await self._wait(duration)
+        finally:
+            profile.disable()
+        return await asyncio.to_thread(self._format_cpu, profile)
+
+    async def _capture_memory(self, duration: float) -> str:
+        # Keep tracing if it was started outside, e.g. with PYTHONTRACEMALLOC
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start(10)
+        try:
+            before = tracemalloc.take_snapshot()
+            await self._wait(duration)
+            after = tracemalloc.take_snapshot()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        return await asyncio.to_thread(self._format_memory, before, after)
+
+    def _format_cpu(self, profile: cProfile.Profile) -> str:
+        output = io.StringIO()
+        stats = pstats.Stats(profile, stream=output)
+        for sort in (pstats.SortKey.CUMULATIVE, pstats.SortKey.TIME):
+            output.write(f"Top {self.top} by {sort.value} time\n")
+            stats.sort_stats(sort).print_stats(self.top)
+        return output.getvalue()
+
+    def _format_memory(
+        self,
+        before: tracemalloc.Snapshot,
+        after: tracemalloc.Snapshot,
+    ) -> str:
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+        before = before.filter_traces(filters)
+        after = after.filter_traces(filters)
+
+        lines = [f"Top {self.top} allocation sites by size"]
+        lines.extend(self._format_stat(stat) for stat in after.statistics("lineno")[:self.top])
+        lines.append("")
+        lines.append(f"Top {self.top} allocation sites by growth during capture")
+        lines.extend(
+            self._format_stat(stat)
+            for stat in after.compare_to(before, "lineno")[:self.top]
+        )
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _format_stat(stat: Union[tracemalloc.Statistic, tracemalloc.StatisticDiff]) -> str:
+        frame = stat.traceback[0]
+        line = f"{stat.size / 1024:10.1f} KiB {stat.count:8} blocks  "
+        line += f"{frame.filename}:{frame.lineno}"
+        if isinstance(stat, tracemalloc.StatisticDiff):
+            line += f"  ({stat.size_diff / 1024:+.1f} KiB, {stat.count_diff:+} blocks)"
+        return line
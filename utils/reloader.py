@@ -0,0 +1,163 @@
+import asyncio
+from pathlib import Path
+from typing import Optional, Union
+
+import structlog
+from pydantic import ValidationError
+
+from config_reader import (
+    L10nConfig,
+    ThrottlingConfig,
+    get_config_path,
+    read_config_file,
+    replace_config,
+)
+from fluent_loader import get_fluent_localizations
+from middlewares import L10nMiddleware, ThrottlingMiddleware
+
+
+logger = structlog.get_logger()
+
+Mtimes = dict[Path, int]
+
+
+class HotReloader:
+    """
+    Reloads translations and configuration when their files change.
+
+    File modification times are polled every `interval` seconds. Changed
+    files are read, parsed and validated in a worker thread, then swapped
+    into the middlewares in one step, so updates keep being handled with
+    either the old or the new version. Files that fail to parse or validate
+    are rejected and the previous version stays in use.
+
+    From the configuration file only throttling limits are applied,
+    other settings still require a restart.
+
+    Usage:
+        reloader = HotReloader(l10n_middleware, l10n_config, throttling_middleware)
+        reloader.start()
+        # ...
+        await reloader.close()
+    """
+
+    def __init__(
+        self,
+        l10n: L10nMiddleware,
+        l10n_config: L10nConfig,
+        throttling: Optional[ThrottlingMiddleware] = None,
+        interval: float = 2.0,
+    ) -> None:
+        """
+        Args:
+            l10n: Middleware to swap localizations in
+            l10n_config: Localization settings used to build localizations
+            throttling: Middleware to apply new throttling limits to
+            interval: Seconds between file checks
+        """
+        self.l10n = l10n
+        self.l10n_config = l10n_config
+        self.throttling = throttling
+        self.interval = interval
+        self.locales_dir = Path(l10n_config.locales_path)
+        self.config_path = get_config_path()
+        self._task: Optional[asyncio.Task] = None
+        self.reloads = 0
+        self.failures = 0
+
+    def start(self) -> None:
+        """Start watching files."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def close(self) -> None:
+        """Stop watching files."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self) -> None:
+        l10n_mtimes = await asyncio.to_thread(self._mtimes, self.locales_dir, "*.ftl")
+        config_mtimes = await asyncio.to_thread(self._mtimes, self.config_path)
+
+        while True:
+            await asyncio.sleep(self.interval)
+
+            mtimes = await asyncio.to_thread(self._mtimes, self.locales_dir, "*.ftl")
+            if mtimes != l10n_mtimes:
+                l10n_mtimes = mtimes
+                await self.reload_l10n()
+
+            mtimes = await asyncio.to_thread(self._mtimes, self.config_path)
+            if mtimes != config_mtimes:
+                config_mtimes = mtimes
+                await self.reload_config()
+
+    async def reload_l10n(self) -> bool:
+        """
+        Rebuild localizations from translation files and swap them in.
+
+        Returns:
+            True if localizations were replaced, False if files were rejected
+        """
+        try:
+            locales = await asyncio.to_thread(
+                get_fluent_localizations,
+                locales_dir=self.locales_dir,
+                fallback_locale=self.l10n_config.fallback_locale,
+                cache_size=self.l10n_config.format_cache_size,
+                strict=True,
+            )
+            self.l10n.set_locales(locales)
+        except (OSError, ValueError) as e:
+            self.failures += 1
+            await logger.aerror("Translations rejected, keeping previous ones", error=str(e))
+            return False
+
+        self.reloads += 1
+        await logger.ainfo("Translations reloaded", locales=sorted(locales))
+        return True
+
+    async def reload_config(self) -> bool:
+        """
+        Re-read configuration file and apply throttling limits from it.
+
+        Returns:
+            True if configuration was replaced, False if the file was rejected
+        """
+        try:
+            config_dict = await asyncio.to_thread(read_config_file)
+            throttling_config = ThrottlingConfig.model_validate(config_dict.get("throttling", {}))
+        except (OSError, ValueError, ValidationError) as e:
+            # tomllib.TOMLDecodeError is a ValueError
+            self.failures += 1
+            await logger.aerror("Config rejected, keeping previous one", error=str(e))
+            return False
+
+        replace_config(config_dict)
+        if self.throttling is not None:
+            self.throttling.set_limits(throttling_config.rate_limit, throttling_config.burst)
+
+        self.reloads += 1
+        await logger.ainfo(
+            "Config reloaded",
+            rate_limit=throttling_config.rate_limit,
+            burst=throttling_config.burst,
+        )
+        return True
+
+    @staticmethod
+    def _mtimes(path: Union[str, Path], pattern: Optional[str] = None) -> Mtimes:
+        path = Path(path)
+        paths = sorted(path.glob(pattern)) if pattern else [path]
+        mtimes = {}
+        for file_path in paths:
+            try:
+                mtimes[file_path] = file_path.stat().st_mtime_ns
+            except FileNotFoundError:
+                pass
+        return mtimes